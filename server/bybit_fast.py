@@ -0,0 +1,65 @@
+"""
+S-O Trading System - Bybit Fast Trade Path
+===========================================
+Thin signed-POST client for the few linear trade endpoints used on the
+order path (create/cancel order, leverage, trading stop).
+
+Endpoint URLs, the category field, static headers and the keyed HMAC
+state are prepared once at construction, so each call is one dict merge,
+one HMAC copy/update and a POST on the executor's pooled session.
+Call signatures match pybit's HTTP methods, so the executor can swap
+between the two freely. Read-only GET endpoints stay on pybit.
+"""
+
+import hmac
+import json
+import time
+import hashlib
+from typing import Dict
+
+import requests
+
+
+class LinearTradeClient:
+    """Signed POSTs to Bybit v5 linear trade endpoints."""
+
+    def __init__(self, session: requests.Session, base_url: str,
+                 api_key: str, api_secret: str,
+                 recv_window: int = 10000, timeout: int = 10):
+        self._session = session
+        self._timeout = timeout
+        # Signature payload is timestamp + api_key + recv_window + body
+        self._sign_prefix = api_key + str(recv_window)
+        self._mac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        self._headers = {
+            "Content-Type": "application/json",
+            "X-BAPI-API-KEY": api_key,
+            "X-BAPI-SIGN-TYPE": "2",
+            "X-BAPI-RECV-WINDOW": str(recv_window),
+        }
+
+        self.place_order = self._endpoint(base_url + "/v5/order/create")
+        self.cancel_order = self._endpoint(base_url + "/v5/order/cancel")
+        self.set_leverage = self._endpoint(base_url + "/v5/position/set-leverage")
+        self.set_trading_stop = self._endpoint(base_url + "/v5/position/trading-stop")
+
+    def _endpoint(self, url: str):
+        """Bind a POST call to a fixed URL with category=linear pre-filled."""
+        def call(**params) -> Dict:
+            return self._post(url, {"category": "linear", **params})
+        return call
+
+    def _post(self, url: str, params: Dict) -> Dict:
+        body = json.dumps(params)
+        timestamp = str(int(time.time() * 1000))
+
+        mac = self._mac.copy()
+        mac.update((timestamp + self._sign_prefix + body).encode())
+
+        headers = dict(self._headers)
+        headers["X-BAPI-TIMESTAMP"] = timestamp
+        headers["X-BAPI-SIGN"] = mac.hexdigest()
+
+        response = self._session.post(url, data=body, headers=headers, timeout=self._timeout)
+        response.raise_for_status()
+        return response.json()
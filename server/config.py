@@ -9,12 +9,33 @@ import os
 from dataclasses import dataclass, field
 
 
-@dataclass
+# Environment is resolved once at import; the dataclasses below use these as plain defaults
+_API_KEY = os.getenv("BYBIT_API_KEY", "")
+_API_SECRET = os.getenv("BYBIT_API_SECRET", "")
+_TESTNET = os.getenv("USE_TESTNET", os.getenv("BYBIT_TESTNET", "true")).lower() == "true"
+
+_RISK_PER_TRADE_PCT = float(os.getenv("RISK_PER_TRADE_PCT", os.getenv("RISK_PER_TRADE", "2.0")))
+_DEFAULT_LEVERAGE = int(os.getenv("MAX_LEVERAGE", os.getenv("DEFAULT_LEVERAGE", "20")))
+_MAX_POSITION_SIZE_PCT = float(os.getenv("MAX_POSITION_SIZE_PCT", "5"))
+_TP_MODE = os.getenv("TP_MODE", "single")
+_MAX_LONGS = int(os.getenv("MAX_LONGS", "4"))
+_MAX_SHORTS = int(os.getenv("MAX_SHORTS", "4"))
+_TRAIL_ENABLED = os.getenv("TRAIL_ENABLED", "true").lower() == "true"
+_TRAIL_TP_THRESHOLD_PCT = float(os.getenv("TRAIL_TP_THRESHOLD_PCT", "85"))
+_TRAIL_SL_MOVE_PCT = float(os.getenv("TRAIL_SL_MOVE_PCT", "30"))
+
+_WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+_WEBHOOK_DEBUG = os.getenv("WEBHOOK_DEBUG", "false").lower() == "true"
+_REDIS_URL = os.getenv("REDIS_URL", "")
+_PORT = int(os.getenv("PORT", "8080"))
+
+
+@dataclass(slots=True, frozen=True)
 class APIConfig:
     """Bybit API Configuration"""
-    api_key: str = field(default_factory=lambda: os.getenv("BYBIT_API_KEY", ""))
-    api_secret: str = field(default_factory=lambda: os.getenv("BYBIT_API_SECRET", ""))
-    testnet: bool = field(default_factory=lambda: os.getenv("USE_TESTNET", os.getenv("BYBIT_TESTNET", "true")).lower() == "true")
+    api_key: str = _API_KEY
+    api_secret: str = _API_SECRET
+    testnet: bool = _TESTNET
 
     @property
     def base_url(self) -> str:
@@ -23,32 +44,34 @@ class APIConfig:
         return "https://api.bybit.com"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RiskConfig:
     """Risk Management"""
-    max_risk_per_trade_pct: float = field(default_factory=lambda: float(os.getenv("RISK_PER_TRADE_PCT", os.getenv("RISK_PER_TRADE", "2.0"))))
-    default_leverage: int = field(default_factory=lambda: int(os.getenv("MAX_LEVERAGE", os.getenv("DEFAULT_LEVERAGE", "20"))))
-    max_position_size_pct: float = field(default_factory=lambda: float(os.getenv("MAX_POSITION_SIZE_PCT", "5")))
-    tp_mode: str = field(default_factory=lambda: os.getenv("TP_MODE", "single"))  # "single" or "split"
-    max_longs: int = field(default_factory=lambda: int(os.getenv("MAX_LONGS", "4")))
-    max_shorts: int = field(default_factory=lambda: int(os.getenv("MAX_SHORTS", "4")))
+    max_risk_per_trade_pct: float = _RISK_PER_TRADE_PCT
+    default_leverage: int = _DEFAULT_LEVERAGE
+    max_position_size_pct: float = _MAX_POSITION_SIZE_PCT
+    tp_mode: str = _TP_MODE  # "single" or "split"
+    max_longs: int = _MAX_LONGS
+    max_shorts: int = _MAX_SHORTS
     # Trailing SL: move SL to profit when price reaches X% of TP distance
-    trail_enabled: bool = field(default_factory=lambda: os.getenv("TRAIL_ENABLED", "true").lower() == "true")
-    trail_tp_threshold_pct: float = field(default_factory=lambda: float(os.getenv("TRAIL_TP_THRESHOLD_PCT", "85")))
-    trail_sl_move_pct: float = field(default_factory=lambda: float(os.getenv("TRAIL_SL_MOVE_PCT", "30")))
+    trail_enabled: bool = _TRAIL_ENABLED
+    trail_tp_threshold_pct: float = _TRAIL_TP_THRESHOLD_PCT
+    trail_sl_move_pct: float = _TRAIL_SL_MOVE_PCT
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Config:
     """Main Configuration"""
     api: APIConfig = field(default_factory=APIConfig)
     risk: RiskConfig = field(default_factory=RiskConfig)
 
     # Webhook
-    webhook_secret: str = field(default_factory=lambda: os.getenv("WEBHOOK_SECRET", ""))
+    webhook_secret: str = _WEBHOOK_SECRET
+    webhook_debug: bool = _WEBHOOK_DEBUG  # log full incoming payloads
+    redis_url: str = _REDIS_URL  # optional: webhook dedup + ready/pending snapshots across restarts
 
     # Server
-    port: int = field(default_factory=lambda: int(os.getenv("PORT", "8080")))
+    port: int = _PORT
 
 
 # Global config instance
@@ -5,16 +5,213 @@ Handles order placement, position management, TP/SL on Bybit.
 """
 
 import os
+import math
+import time
+import logging
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
-from dataclasses import dataclass
-
-from pybit.unified_trading import HTTP
+from decimal import Decimal
+from typing import TYPE_CHECKING, Dict, List, Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+# pybit and requests are imported on first API call (see BybitExecutor.client) so that
+# importing this module for rounding/sizing helpers or dataclasses stays cheap.
+if TYPE_CHECKING:
+    import requests
+    from pybit.unified_trading import HTTP
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 from config import config
 
+log = logging.getLogger("executor")
+
+# Instrument filters rarely change; refetch at most once per hour per symbol
+SYMBOL_INFO_TTL = 3600
+# Equity only moves with closed PnL (callers invalidate on exits); reuse it for a while
+EQUITY_TTL = 10
+# If a refresh fails, an equity value up to this old still beats refusing the trade
+EQUITY_STALE_OK = 30
+# Bybit retCode for "params error: symbol invalid"
+INVALID_SYMBOL_CODE = 10001
+# Max position size as a fraction of equity (config is frozen, so resolve once)
+_MAX_POSITION_FRACTION = config.risk.max_position_size_pct / 100
+# String forms Bybit uses for a flat position
+_ZERO_SIZES = frozenset(('', '0', '0.0'))
+# Bybit retCode for "leverage not modified"
+LEVERAGE_NOT_MODIFIED_CODE = 110043
+# Per-request HTTP timeout for Bybit REST calls (seconds)
+BYBIT_TIMEOUT = 5
+# Consecutive Bybit failures before the circuit opens, and how long it stays open
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_TIMEOUT = 30
+
+
+def _orjson_response_hook(response, *args, **kwargs):
+    """Decode Bybit responses with orjson; fall back to requests' decoder on bad JSON"""
+    def fast_json(**json_kwargs):
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            from requests import Response
+            return Response.json(response, **json_kwargs)
+    response.json = fast_json
+    return response
+
+
+def _configure_session(session: "requests.Session") -> "requests.Session":
+    """Mount a pooled keep-alive adapter so all REST calls reuse one TLS connection"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    if ORJSON_AVAILABLE:
+        session.hooks['response'].append(_orjson_response_hook)
+    return session
+
+
+def _step_inverse(step: float) -> Optional[int]:
+    """Integer scale for a step (0.001 -> 1000), or None if the step isn't 1/n"""
+    if step <= 0 or step >= 1:
+        return None
+    inv = round(1 / step)
+    if abs(inv * step - 1) > 1e-9:
+        return None
+    return inv
+
+
+def _step_decimals(step: float) -> int:
+    """Decimal places a step needs (0.001 -> 3, 0.25 -> 2, 1 -> 0)"""
+    return max(0, -Decimal(repr(step)).normalize().as_tuple().exponent)
+
+
+def _with_inverses(symbol_info: Dict) -> Dict:
+    """Add precomputed qty/tick scales and decimal places so rounding and formatting are cheap"""
+    symbol_info['qty_step_inv'] = _step_inverse(symbol_info['qty_step'])
+    symbol_info['tick_inv'] = _step_inverse(symbol_info['tick_size'])
+    symbol_info['qty_decimals'] = _step_decimals(symbol_info['qty_step'])
+    symbol_info['tick_decimals'] = _step_decimals(symbol_info['tick_size'])
+    return symbol_info
+
+
+def _round_to_step(value: float, step: float, step_inv: int = None) -> float:
+    """Round to the nearest step; integer scaling avoids float drift like 0.30000000000000004"""
+    if step_inv is None:
+        step_inv = _step_inverse(step)
+        if step_inv is None:
+            return round(value / step) * step
+    return math.floor(value * step_inv + 0.5) / step_inv
+
+
+def _resolve_order(future) -> tuple:
+    """Resolve a place_order future to (order_id, None) or (None, error message)"""
+    try:
+        result = future.result()
+    except Exception as e:
+        return None, str(e)
+    if result['retCode'] == 0:
+        return result['result']['orderId'], None
+    return None, result['retMsg']
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    """
+    True if exc means Bybit was unreachable or failing (network error, timeout,
+    HTTP 5xx), as opposed to a rejection (retCode != 0) or a local bug.
+    """
+    from requests.exceptions import ConnectionError, HTTPError, Timeout
+    from pybit.exceptions import FailedRequestError
+
+    if isinstance(exc, (ConnectionError, Timeout)):
+        return True
+    if isinstance(exc, HTTPError):  # LinearTradeClient's raise_for_status
+        return exc.response is not None and exc.response.status_code >= 500
+    if isinstance(exc, FailedRequestError):
+        # pybit reports exhausted network retries as 400
+        return exc.status_code == 400 or exc.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for Bybit calls.
+
+    Opens after fail_max failures in a row; while open, allow() is False so
+    callers can reject early instead of waiting on timeouts. After
+    reset_timeout one trial call is let through (half-open): success closes
+    the circuit, failure keeps it open for another reset_timeout.
+    """
+
+    def __init__(self, fail_max: int = BREAKER_FAIL_MAX, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None  # monotonic time the circuit (re)opened
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """True if a call may go out now (closed, or the half-open trial)"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Re-arm so only this caller gets the trial
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        if self._failures or self._opened_at is not None:
+            with self._lock:
+                if self._opened_at is not None:
+                    log.info("Bybit circuit closed")
+                self._failures = 0
+                self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    log.error("Bybit circuit open after %d consecutive failures", self._failures)
+                self._opened_at = time.monotonic()
+
+    def record_outcome(self, exc: Optional[BaseException]):
+        """
+        Record one Bybit call: None or a rejection (pybit's InvalidRequestError)
+        means Bybit answered; transport errors count as failures; anything else
+        (a local bug) leaves the breaker alone.
+        """
+        from pybit.exceptions import InvalidRequestError
 
-@dataclass
+        if exc is None or isinstance(exc, InvalidRequestError):
+            self.record_success()
+        elif _is_transport_error(exc):
+            self.record_failure()
+
+
+@dataclass(slots=True)
 class OrderResult:
     """Result of an order execution"""
     success: bool
@@ -25,7 +222,7 @@ class OrderResult:
     timestamp: datetime = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Position:
     """Active position on exchange"""
     symbol: str
@@ -38,33 +235,124 @@ class Position:
     stop_loss: float = None
 
 
+@dataclass(slots=True)
+class AccountSnapshot:
+    """Balance, positions and open orders fetched in one concurrent round-trip"""
+    equity: float = 0
+    balance: Dict = field(default_factory=dict)
+    positions: List[Position] = field(default_factory=list)
+    positions_ok: bool = False  # False if the positions fetch failed (positions is then empty, not flat)
+    open_orders: list = field(default_factory=list)
+
+
 class BybitExecutor:
     """
     Executes orders on Bybit Unified Trading API.
     """
 
     def __init__(self):
-        self.client = HTTP(
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bybit")
+        self._symbol_info_cache: Dict[str, tuple] = {}  # symbol -> (fetched_at, info)
+        self._equity_cache: tuple = (0.0, 0)  # (fetched_at, equity)
+        self._equity_lock = threading.Lock()  # one refresh in flight; other callers wait for it
+        # symbol -> leverage applied by this process or seen on an open position.
+        # In memory only: a file would outlive account switches and UI changes.
+        self._leverage_cache: Dict[str, int] = {}
+        self.breaker = CircuitBreaker()  # trips on transport errors, not on rejections
+
+    @cached_property
+    def client(self) -> "HTTP":
+        """pybit client, created (and pybit imported) on first API call"""
+        from pybit.unified_trading import HTTP
+
+        client = HTTP(
             testnet=config.api.testnet,
             api_key=config.api.api_key,
             api_secret=config.api.api_secret,
-            recv_window=10000
+            recv_window=10000,
+            timeout=BYBIT_TIMEOUT,
+        )
+        # pybit has no session= argument; tune the requests.Session it owns instead
+        self._session = _configure_session(client.client)
+        log.info("Bybit client initialized (testnet=%s)", config.api.testnet)
+        return client
+
+    @cached_property
+    def trade(self):
+        """
+        Client for order-path POSTs (create/cancel order, leverage, trading stop).
+
+        Uses the pre-signed LinearTradeClient on the pooled session when API
+        keys are set; otherwise pybit, which raises its usual auth error.
+        """
+        client = self.client
+        if not (config.api.api_key and config.api.api_secret):
+            return client
+        from bybit_fast import LinearTradeClient
+        return LinearTradeClient(
+            self._session,
+            config.api.base_url,
+            config.api.api_key,
+            config.api.api_secret,
+            recv_window=10000,
+            timeout=BYBIT_TIMEOUT,
         )
-        print(f"[EXECUTOR] Bybit client initialized (testnet={config.api.testnet})")
 
     def get_account_equity(self) -> float:
-        """Get current account equity in USDT"""
-        try:
-            result = self.client.get_wallet_balance(accountType="UNIFIED", coin="USDT")
-            if result['retCode'] == 0:
-                equity = float(result['result']['list'][0]['totalEquity'])
+        """
+        Get current account equity in USDT.
+
+        Cached for EQUITY_TTL seconds; concurrent callers share one refresh.
+        If the refresh fails, a value up to EQUITY_STALE_OK seconds old is used.
+        """
+        fetched_at, equity = self._equity_cache
+        if equity and time.monotonic() - fetched_at < EQUITY_TTL:
+            return equity
+
+        with self._equity_lock:
+            # Refreshed by another thread while we waited
+            fetched_at, equity = self._equity_cache
+            if equity and time.monotonic() - fetched_at < EQUITY_TTL:
+                return equity
+
+            try:
+                result = self.client.get_wallet_balance(accountType="UNIFIED", coin="USDT")
+                self.breaker.record_success()
+                fresh = self._parse_equity(result)
+                if fresh:
+                    self._equity_cache = (time.monotonic(), fresh)
+                    return fresh
+            except Exception as e:
+                self.breaker.record_outcome(e)
+                log.error("Failed to get equity: %s", e)
+
+            if equity and time.monotonic() - fetched_at < EQUITY_STALE_OK:
+                log.warning("Using equity cached %.0fs ago", time.monotonic() - fetched_at)
                 return equity
-        except Exception as e:
-            print(f"[ERROR] Failed to get equity: {e}")
         return 0
 
+    def invalidate_equity(self):
+        """Force the next get_account_equity() to refetch (after PnL is realized)"""
+        self._equity_cache = (0.0, 0)
+
     def get_balance(self) -> Dict:
         """Get detailed account balance"""
+        try:
+            response = self.client.get_wallet_balance(accountType="UNIFIED", coin="USDT")
+            return self._parse_balance(response)
+        except Exception as e:
+            return {'error': str(e)}
+
+    @staticmethod
+    def _parse_equity(response: Dict) -> float:
+        """Extract total equity from a wallet-balance response"""
+        if response['retCode'] == 0:
+            return float(response['result']['list'][0]['totalEquity'])
+        return 0
+
+    @staticmethod
+    def _parse_balance(response: Dict) -> Dict:
+        """Extract USDT balance details from a wallet-balance response"""
         def safe_float(val, default=0.0):
             if val is None or val == '':
                 return default
@@ -73,88 +361,115 @@ class BybitExecutor:
             except (ValueError, TypeError):
                 return default
 
-        try:
-            response = self.client.get_wallet_balance(accountType="UNIFIED", coin="USDT")
-            if response['retCode'] == 0:
-                coins = response['result']['list'][0]['coin']
-                usdt = next((c for c in coins if c['coin'] == 'USDT'), None)
-                if usdt:
-                    equity = safe_float(usdt.get('equity'), 0)
-                    wallet_balance = safe_float(usdt.get('walletBalance'), 0)
-                    available = wallet_balance if wallet_balance > 0 else equity
-
-                    if equity == 0 and available == 0:
-                        return {'error': 'No USDT balance. Please add funds.'}
-
-                    return {
-                        'equity': equity,
-                        'available': available,
-                        'wallet_balance': wallet_balance,
-                        'unrealized_pnl': safe_float(usdt.get('unrealisedPnl'), 0)
-                    }
-            return {'error': response.get('retMsg', 'Unknown error')}
-        except Exception as e:
-            return {'error': str(e)}
+        if response['retCode'] == 0:
+            coins = response['result']['list'][0]['coin']
+            usdt = next((c for c in coins if c['coin'] == 'USDT'), None)
+            if usdt:
+                equity = safe_float(usdt.get('equity'), 0)
+                wallet_balance = safe_float(usdt.get('walletBalance'), 0)
+                available = wallet_balance if wallet_balance > 0 else equity
+
+                if equity == 0 and available == 0:
+                    return {'error': 'No USDT balance. Please add funds.'}
+
+                return {
+                    'equity': equity,
+                    'available': available,
+                    'wallet_balance': wallet_balance,
+                    'unrealized_pnl': safe_float(usdt.get('unrealisedPnl'), 0)
+                }
+        return {'error': response.get('retMsg', 'Unknown error')}
 
     def get_symbol_info(self, symbol: str) -> Dict:
-        """Get symbol trading rules (min qty, tick size, etc.)"""
+        """
+        Get symbol trading rules (min qty, tick size, etc.).
+
+        Instrument filters change on the order of days, so results are cached
+        per symbol for SYMBOL_INFO_TTL seconds. On a transient fetch error a
+        stale entry is served rather than the generic defaults.
+        """
+        cached = self._symbol_info_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < SYMBOL_INFO_TTL:
+            return cached[1]
+
         try:
             result = self.client.get_instruments_info(category="linear", symbol=symbol)
             if result['retCode'] == 0 and result['result']['list']:
                 info = result['result']['list'][0]
-                return {
+                symbol_info = _with_inverses({
                     'min_qty': float(info['lotSizeFilter']['minOrderQty']),
                     'qty_step': float(info['lotSizeFilter']['qtyStep']),
                     'tick_size': float(info['priceFilter']['tickSize']),
                     'min_notional': float(info.get('lotSizeFilter', {}).get('minNotionalValue', 5))
-                }
+                })
+                self._symbol_info_cache[symbol] = (time.monotonic(), symbol_info)
+                return symbol_info
+            # Empty list = unknown symbol
+            self._symbol_info_cache.pop(symbol, None)
         except Exception as e:
-            print(f"[ERROR] Failed to get symbol info: {e}")
-        return {'min_qty': 0.001, 'qty_step': 0.001, 'tick_size': 0.01, 'min_notional': 5}
-
-    def round_qty(self, qty: float, step: float) -> float:
-        """Round quantity to valid step"""
-        return round(qty / step) * step
-
-    def round_price(self, price: float, tick: float) -> float:
-        """Round price to valid tick"""
-        return round(price / tick) * tick
+            # pybit's InvalidRequestError carries Bybit's retCode as status_code
+            if getattr(e, 'status_code', None) == INVALID_SYMBOL_CODE:
+                self._symbol_info_cache.pop(symbol, None)
+            log.error("Failed to get symbol info: %s", e)
+
+        cached = self._symbol_info_cache.get(symbol)
+        if cached:
+            return cached[1]
+        return _with_inverses({'min_qty': 0.001, 'qty_step': 0.001, 'tick_size': 0.01, 'min_notional': 5})
+
+    def clear_symbol_cache(self, symbol: str = None):
+        """Drop cached symbol info (one symbol, or all if none given)"""
+        if symbol:
+            self._symbol_info_cache.pop(symbol, None)
+        else:
+            self._symbol_info_cache.clear()
+
+    def round_qty(self, qty: float, step: float, step_inv: int = None) -> float:
+        """Round quantity to valid step (pass symbol_info['qty_step_inv'] to skip the division)"""
+        return _round_to_step(qty, step, step_inv)
+
+    def round_price(self, price: float, tick: float, tick_inv: int = None) -> float:
+        """Round price to valid tick (pass symbol_info['tick_inv'] to skip the division)"""
+        return _round_to_step(price, tick, tick_inv)
 
     def set_leverage(self, symbol: str, leverage: int) -> bool:
-        """Set leverage for symbol"""
+        """
+        Set leverage for symbol.
+
+        Skips the REST call when this leverage was already applied to the
+        symbol by this process, or is what Bybit last reported for an open
+        position (get_all_positions keeps that in sync).
+        """
+        if self._leverage_cache.get(symbol) == leverage:
+            return True
         try:
-            response = self.client.set_leverage(
+            response = self.trade.set_leverage(
                 category="linear",
                 symbol=symbol,
                 buyLeverage=str(leverage),
                 sellLeverage=str(leverage)
             )
-            if response['retCode'] == 0 or response['retCode'] == 110043:
-                return True
+            ok = response['retCode'] in (0, LEVERAGE_NOT_MODIFIED_CODE)
         except Exception as e:
-            if '110043' in str(e) or 'not modified' in str(e).lower():
-                return True
-        return False
+            ok = str(LEVERAGE_NOT_MODIFIED_CODE) in str(e) or 'not modified' in str(e).lower()
+        if ok:
+            self._leverage_cache[symbol] = leverage
+        return ok
 
     def calculate_position_size(self, equity: float, risk_pct: float,
                                  entry: float, sl: float, leverage: int) -> float:
-        """Calculate position size based on risk"""
-        risk_amount = equity * (risk_pct / 100)
-        sl_distance_pct = abs(entry - sl) / entry
-
-        if sl_distance_pct == 0:
-            return 0
+        """Calculate position size based on risk, capped at max position size"""
+        diff = entry - sl
+        if diff == 0:
+            return 0.0
+        sl_distance_pct = diff / entry if diff > 0 else -diff / entry
 
-        # Position value to achieve desired risk
-        position_value = risk_amount / sl_distance_pct
-
-        # Cap at max position size
-        max_position_value = equity * (config.risk.max_position_size_pct / 100) * leverage
-        position_value = min(position_value, max_position_value)
+        # Position value to achieve desired risk vs. the max position cap
+        position_value = equity * risk_pct * 0.01 / sl_distance_pct
+        max_position_value = equity * _MAX_POSITION_FRACTION * leverage
 
         # Convert to quantity
-        qty = position_value / entry
-        return qty
+        return min(position_value, max_position_value) / entry
 
     def place_order(self, symbol: str, direction: str, qty: float,
                     entry: float, sl: float, tp: float,
@@ -169,37 +484,47 @@ class BybitExecutor:
         Returns order ID if successful.
         """
         try:
-            qty = self.round_qty(qty, symbol_info['qty_step'])
-            entry = self.round_price(entry, symbol_info['tick_size'])
-            sl = self.round_price(sl, symbol_info['tick_size'])
-            tp = self.round_price(tp, symbol_info['tick_size'])
+            qty_step, qty_inv = symbol_info['qty_step'], symbol_info.get('qty_step_inv')
+            tick, tick_inv = symbol_info['tick_size'], symbol_info.get('tick_inv')
+
+            qty = _round_to_step(qty, qty_step, qty_inv)
+            entry = _round_to_step(entry, tick, tick_inv)
+            sl = _round_to_step(sl, tick, tick_inv)
+            tp = _round_to_step(tp, tick, tick_inv)
 
             if qty < symbol_info['min_qty']:
-                print(f"[WARN] Qty {qty} below minimum {symbol_info['min_qty']}")
+                log.warning("Qty %s below minimum %s", qty, symbol_info['min_qty'])
                 return None
 
+            # Fixed-point strings; str(float) can produce '1e-05', which Bybit rejects
+            qty_dp = symbol_info.get('qty_decimals', _step_decimals(qty_step))
+            tick_dp = symbol_info.get('tick_decimals', _step_decimals(tick))
+            entry_str = f"{entry:.{tick_dp}f}"
+            sl_str = f"{sl:.{tick_dp}f}"
+
             side = "Buy" if direction.lower() == "long" else "Sell"
 
             if tp_mode == "single":
-                result = self.client.place_order(
+                result = self.trade.place_order(
                     category="linear",
                     symbol=symbol,
                     side=side,
                     orderType="Limit",
-                    qty=str(qty),
-                    price=str(entry),
-                    stopLoss=str(sl),
-                    takeProfit=str(tp),
+                    qty=f"{qty:.{qty_dp}f}",
+                    price=entry_str,
+                    stopLoss=sl_str,
+                    takeProfit=f"{tp:.{tick_dp}f}",
                     timeInForce="GTC",
                     reduceOnly=False
                 )
+                self.breaker.record_success()
 
                 if result['retCode'] == 0:
                     order_id = result['result']['orderId']
-                    print(f"  [ORDER] {side} {qty} @ {entry}, TP={tp}, SL={sl} -> {order_id[:8]}...")
+                    log.info("[ORDER] %s %s @ %s, TP=%s, SL=%s -> %s...", side, qty, entry, tp, sl, order_id[:8])
                     return order_id
                 else:
-                    print(f"  [ERROR] Order failed: {result['retMsg']}")
+                    log.error("Order failed: %s", result['retMsg'])
                     return None
 
             else:
@@ -209,156 +534,220 @@ class BybitExecutor:
                     tp2 = entry + tp2_distance
                 else:
                     tp2 = entry - tp2_distance
-                tp2 = self.round_price(tp2, symbol_info['tick_size'])
+                tp2 = _round_to_step(tp2, tick, tick_inv)
 
-                qty1 = self.round_qty(qty * 0.5, symbol_info['qty_step'])
-                qty2 = self.round_qty(qty - qty1, symbol_info['qty_step'])
+                qty1 = _round_to_step(qty * 0.5, qty_step, qty_inv)
+                qty2 = _round_to_step(qty - qty1, qty_step, qty_inv)
 
-                # Order 1: 50% with TP1
-                result1 = self.client.place_order(
+                # Both halves are independent, so send them concurrently
+                order = dict(
                     category="linear",
                     symbol=symbol,
                     side=side,
                     orderType="Limit",
-                    qty=str(qty1),
-                    price=str(entry),
-                    stopLoss=str(sl),
-                    takeProfit=str(tp),
+                    price=entry_str,
+                    stopLoss=sl_str,
                     timeInForce="GTC",
                     reduceOnly=False
                 )
-
-                order_id_1 = None
-                if result1['retCode'] == 0:
-                    order_id_1 = result1['result']['orderId']
-                    print(f"  [ORDER 1] {side} {qty1} @ {entry}, TP1={tp}, SL={sl} -> {order_id_1[:8]}...")
-                else:
-                    print(f"  [ERROR] Order 1 failed: {result1['retMsg']}")
+                fut1 = self._pool.submit(self.trade.place_order, qty=f"{qty1:.{qty_dp}f}",
+                                         takeProfit=f"{tp:.{tick_dp}f}", **order)
+                fut2 = self._pool.submit(self.trade.place_order, qty=f"{qty2:.{qty_dp}f}",
+                                         takeProfit=f"{tp2:.{tick_dp}f}", **order)
+                order_id_1, error_1 = _resolve_order(fut1)
+                order_id_2, error_2 = _resolve_order(fut2)
+                self.breaker.record_outcome(fut1.exception())
+                self.breaker.record_outcome(fut2.exception())
+
+                if not order_id_1:
+                    log.error("Order 1 failed: %s", error_1)
+                    # Order 2 went out in parallel; don't leave half a position behind
+                    if order_id_2:
+                        self.cancel_order(symbol, order_id_2)
                     return None
 
-                # Order 2: 50% with TP2
-                result2 = self.client.place_order(
-                    category="linear",
-                    symbol=symbol,
-                    side=side,
-                    orderType="Limit",
-                    qty=str(qty2),
-                    price=str(entry),
-                    stopLoss=str(sl),
-                    takeProfit=str(tp2),
-                    timeInForce="GTC",
-                    reduceOnly=False
-                )
-
-                if result2['retCode'] == 0:
-                    order_id_2 = result2['result']['orderId']
-                    print(f"  [ORDER 2] {side} {qty2} @ {entry}, TP2={tp2}, SL={sl} -> {order_id_2[:8]}...")
+                log.info("[ORDER 1] %s %s @ %s, TP1=%s, SL=%s -> %s...", side, qty1, entry, tp, sl, order_id_1[:8])
+                if order_id_2:
+                    log.info("[ORDER 2] %s %s @ %s, TP2=%s, SL=%s -> %s...", side, qty2, entry, tp2, sl, order_id_2[:8])
+                else:
+                    log.error("Order 2 failed: %s", error_2)
 
                 return order_id_1
 
         except Exception as e:
-            print(f"[ERROR] Place order failed: {e}")
+            self.breaker.record_outcome(e)
+            log.error("Place order failed: %s", e)
             return None
 
     def close_position(self, symbol: str) -> bool:
         """Market close a position"""
         try:
             result = self.client.get_positions(category="linear", symbol=symbol)
+            self.breaker.record_success()
             if result['retCode'] == 0 and result['result']['list']:
                 for pos in result['result']['list']:
                     size = float(pos.get('size', 0))
                     if size > 0:
                         side = "Sell" if pos['side'] == "Buy" else "Buy"
-                        self.client.place_order(
+                        self.trade.place_order(
                             category="linear",
                             symbol=symbol,
                             side=side,
                             orderType="Market",
-                            qty=str(size),
+                            qty=pos['size'],  # already in exchange format
                             reduceOnly=True
                         )
-                        print(f"[CLOSE] Market closed {symbol}")
+                        log.info("[CLOSE] Market closed %s", symbol)
                         return True
         except Exception as e:
-            print(f"[ERROR] Close position failed: {e}")
+            self.breaker.record_outcome(e)
+            log.error("Close position failed: %s", e)
         return False
 
     def get_position(self, symbol: str) -> Optional[Position]:
         """Get current position for symbol"""
         try:
             response = self.client.get_positions(category="linear", symbol=symbol)
-            if response['retCode'] == 0 and response['result']['list']:
-                pos = response['result']['list'][0]
-                size = float(pos['size'])
-                if size > 0:
-                    return Position(
-                        symbol=symbol,
-                        side=pos['side'],
-                        size=size,
-                        entry_price=float(pos['avgPrice']),
-                        leverage=int(pos['leverage']),
-                        unrealized_pnl=float(pos['unrealisedPnl']),
-                        take_profit=float(pos['takeProfit']) if pos['takeProfit'] else None,
-                        stop_loss=float(pos['stopLoss']) if pos['stopLoss'] else None
-                    )
+            positions = self._parse_positions(response)
+            if positions:
+                return positions[0]
         except Exception as e:
-            print(f"Error getting position: {e}")
+            log.error("Error getting position: %s", e)
         return None
 
-    def get_all_positions(self) -> List[Position]:
-        """Get all open positions"""
-        positions = []
+    def get_all_positions(self) -> Optional[List[Position]]:
+        """
+        Get all open positions.
+
+        Returns None if the fetch failed, so callers can tell "flat" from "unknown".
+        """
         try:
             response = self.client.get_positions(category="linear", settleCoin="USDT")
-            if response['retCode'] == 0:
-                for pos in response['result']['list']:
-                    if float(pos['size']) > 0:
-                        positions.append(Position(
-                            symbol=pos['symbol'],
-                            side=pos['side'],
-                            size=float(pos['size']),
-                            entry_price=float(pos['avgPrice']),
-                            leverage=int(pos['leverage']),
-                            unrealized_pnl=float(pos['unrealisedPnl']),
-                            take_profit=float(pos['takeProfit']) if pos['takeProfit'] else None,
-                            stop_loss=float(pos['stopLoss']) if pos['stopLoss'] else None
-                        ))
+            self.breaker.record_success()
+            if response['retCode'] != 0:
+                log.error("Error getting positions: %s", response['retMsg'])
+                return None
+            positions = self._parse_positions(response)
+            # Exchange truth wins over what this process last applied
+            for pos in positions:
+                self._leverage_cache[pos.symbol] = pos.leverage
+            return positions
         except Exception as e:
-            print(f"Error getting positions: {e}")
+            self.breaker.record_outcome(e)
+            log.error("Error getting positions: %s", e)
+        return None
+
+    @staticmethod
+    def _parse_positions(response: Dict) -> List[Position]:
+        """Build Position objects for all non-empty rows of a positions response"""
+        positions = []
+        if response['retCode'] != 0:
+            return positions
+
+        _float = float
+        _Position = Position
+        append = positions.append
+        for pos in response['result']['list']:
+            size_s = pos['size']
+            # Most rows on a settleCoin query are flat; skip them before any float parsing
+            if size_s in _ZERO_SIZES:
+                continue
+            size = _float(size_s)
+            if size <= 0:
+                continue
+            tp = pos['takeProfit']
+            sl = pos['stopLoss']
+            append(_Position(
+                symbol=pos['symbol'],
+                side=pos['side'],
+                size=size,
+                entry_price=_float(pos['avgPrice']),
+                leverage=int(pos['leverage']),
+                unrealized_pnl=_float(pos['unrealisedPnl']),
+                take_profit=_float(tp) if tp else None,
+                stop_loss=_float(sl) if sl else None
+            ))
         return positions
 
+    def snapshot(self) -> AccountSnapshot:
+        """
+        Fetch wallet balance, positions and open orders concurrently.
+
+        The three REST calls are independent, so firing them together costs
+        one round-trip instead of three.
+        """
+        fut_wallet = self._pool.submit(self.client.get_wallet_balance, accountType="UNIFIED", coin="USDT")
+        fut_positions = self._pool.submit(self.client.get_positions, category="linear", settleCoin="USDT")
+        fut_orders = self._pool.submit(self.client.get_open_orders, category="linear", settleCoin="USDT")
+
+        snap = AccountSnapshot()
+        try:
+            wallet = fut_wallet.result()
+            self.breaker.record_success()
+            snap.equity = self._parse_equity(wallet)
+            if snap.equity:
+                self._equity_cache = (time.monotonic(), snap.equity)
+            snap.balance = self._parse_balance(wallet)
+        except Exception as e:
+            self.breaker.record_outcome(e)
+            log.error("Failed to get equity: %s", e)
+            snap.balance = {'error': str(e)}
+        try:
+            response = fut_positions.result()
+            self.breaker.record_success()
+            snap.positions = self._parse_positions(response)
+            snap.positions_ok = response['retCode'] == 0
+        except Exception as e:
+            self.breaker.record_outcome(e)
+            log.error("Error getting positions: %s", e)
+        try:
+            response = fut_orders.result()
+            self.breaker.record_success()
+            if response['retCode'] == 0:
+                snap.open_orders = response['result']['list']
+        except Exception as e:
+            self.breaker.record_outcome(e)
+            log.error("Error getting open orders: %s", e)
+        return snap
+
     def update_stop_loss(self, symbol: str, side: str, sl: float, symbol_info: Dict = None) -> bool:
         """Update stop loss for an open position"""
         try:
             tick = symbol_info['tick_size'] if symbol_info else 0.01
-            sl = self.round_price(sl, tick)
+            tick_inv = symbol_info.get('tick_inv') if symbol_info else 100
+            tick_dp = symbol_info.get('tick_decimals', _step_decimals(tick)) if symbol_info else 2
+            sl = _round_to_step(sl, tick, tick_inv)
 
-            response = self.client.set_trading_stop(
+            response = self.trade.set_trading_stop(
                 category="linear",
                 symbol=symbol,
                 positionIdx=0,  # one-way mode (cross)
-                stopLoss=str(sl),
+                stopLoss=f"{sl:.{tick_dp}f}",
             )
+            self.breaker.record_success()
             if response['retCode'] == 0:
-                print(f"  [SL UPDATE] {symbol} new SL={sl}")
+                log.info("[SL UPDATE] %s new SL=%s", symbol, sl)
                 return True
             else:
-                print(f"  [ERROR] SL update failed: {response['retMsg']}")
+                log.error("SL update failed: %s", response['retMsg'])
         except Exception as e:
-            print(f"[ERROR] Update SL failed: {e}")
+            self.breaker.record_outcome(e)
+            log.error("Update SL failed: %s", e)
         return False
 
     def cancel_order(self, symbol: str, order_id: str) -> bool:
         """Cancel a pending order"""
         try:
-            response = self.client.cancel_order(
+            response = self.trade.cancel_order(
                 category="linear",
                 symbol=symbol,
                 orderId=order_id
             )
+            self.breaker.record_success()
             return response['retCode'] == 0
         except Exception as e:
-            print(f"Error cancelling order: {e}")
+            self.breaker.record_outcome(e)
+            log.error("Error cancelling order: %s", e)
             return False
 
     def get_open_orders(self, symbol: str = None) -> list:
@@ -372,5 +761,5 @@ class BybitExecutor:
                 return response['result']['list']
             return []
         except Exception as e:
-            print(f"Error getting open orders: {e}")
+            log.error("Error getting open orders: %s", e)
             return []
@@ -0,0 +1,26 @@
+"""
+S-O Trading System - Gunicorn Config
+=====================================
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+One worker only: positions, pending orders, ready states, shadow trades
+and the trailing SL monitor live in process memory, so a second worker
+would see (and manage) a different copy. Concurrency comes from threads;
+webhook handlers spend most of their time waiting on Bybit/Supabase.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+timeout = 120
+# Services start in the worker (wsgi.py); a preloading master would fork without their threads
+preload_app = False
+
+
+def post_worker_init(worker):
+    """Start the executor, price stream and monitors inside the worker (no-op if wsgi.py already did)."""
+    import webhook_server
+    webhook_server.start_services()
@@ -0,0 +1,133 @@
+"""
+S-O Trading System - Live Price Stream
+=======================================
+Keeps the latest Bybit linear ticker price for a set of symbols via one
+public websocket, so price checks are dict lookups instead of REST calls.
+
+Used by the shadow trade monitor: symbols are subscribed while they have
+active shadow trades and unsubscribed once those resolve.
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from config import config
+
+log = logging.getLogger("price_stream")
+
+# Bybit pushes linear tickers every 100ms; a price older than this means the
+# topic or the socket went quiet, and callers should fall back to REST
+PRICE_STALE_SEC = 5
+
+
+class PriceStream:
+    """
+    Latest lastPrice per symbol from the Bybit public ticker stream.
+    """
+
+    def __init__(self, on_tick: Optional[Callable[[str, float], None]] = None):
+        self.on_tick = on_tick  # called as on_tick(symbol, price) on every update
+        self.prices: Dict[str, float] = {}
+        self._ticked_at: Dict[str, float] = {}  # symbol -> monotonic time of the last tick
+
+        # Symbols we want prices for, and those subscribed on the current ws
+        self._wanted: set = set()
+        self._subscribed: set = set()
+        self._lock = threading.Lock()
+
+        self.ws = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Connect in a background thread (retries until connected)."""
+        thread = threading.Thread(target=self._connect, daemon=True)
+        thread.start()
+        log.info("Started")
+
+    def stop(self):
+        """Close the websocket."""
+        self._stop_event.set()
+        if self.ws:
+            try:
+                self.ws.exit()
+            except Exception:
+                pass
+
+    def price(self, symbol: str) -> Optional[float]:
+        """Latest streamed price, or None if there is none younger than PRICE_STALE_SEC."""
+        ticked_at = self._ticked_at.get(symbol)
+        if ticked_at is None or time.monotonic() - ticked_at > PRICE_STALE_SEC:
+            return None
+        return self.prices.get(symbol)
+
+    def subscribe(self, symbol: str):
+        """Start streaming a symbol (no-op if already subscribed)."""
+        with self._lock:
+            self._wanted.add(symbol)
+            if self.ws is None or symbol in self._subscribed:
+                return
+            self._subscribe(symbol)
+
+    def unsubscribe(self, symbol: str):
+        """Stop streaming a symbol and forget its price."""
+        with self._lock:
+            self._wanted.discard(symbol)
+            self.prices.pop(symbol, None)
+            self._ticked_at.pop(symbol, None)
+            if self.ws is None or symbol not in self._subscribed:
+                return
+            self._subscribed.discard(symbol)
+            try:
+                self.ws.unsubscribe(f"tickers.{symbol}")
+            except Exception as e:
+                log.error("Unsubscribe error for %s: %s", symbol, e)
+
+    def _connect(self):
+        """Open the websocket and subscribe everything requested so far."""
+        # Imported here so loading this module doesn't pull in pybit's websocket stack
+        from pybit.unified_trading import WebSocket
+
+        while not self._stop_event.is_set():
+            try:
+                ws = WebSocket(testnet=config.api.testnet, channel_type="linear")
+                with self._lock:
+                    self.ws = ws
+                    self._subscribed = set()
+                    for symbol in self._wanted:
+                        self._subscribe(symbol)
+                log.info("Websocket connected, watching %d symbols", len(self._wanted))
+                return
+            except Exception as e:
+                log.warning("Websocket error: %s, retrying in 5s...", e)
+                self._stop_event.wait(timeout=5)
+
+    def _subscribe(self, symbol: str):
+        """
+        Subscribe one symbol; caller holds self._lock.
+
+        One topic per request: pybit unsubscribes by resending the original
+        subscribe message, so a batched subscription would be torn down whole.
+        """
+        try:
+            self.ws.ticker_stream(symbol=symbol, callback=self._on_ticker)
+            self._subscribed.add(symbol)
+        except Exception as e:
+            log.error("Subscribe error for %s: %s", symbol, e)
+
+    def _on_ticker(self, message: dict):
+        """Store the latest price and notify the listener."""
+        try:
+            data = message.get('data', {})
+            symbol = data.get('symbol', '')
+            last_price = float(data.get('lastPrice', 0))
+            if not symbol or not last_price or symbol not in self._wanted:
+                return
+
+            self.prices[symbol] = last_price
+            self._ticked_at[symbol] = time.monotonic()
+            if self.on_tick:
+                self.on_tick(symbol, last_price)
+        except Exception as e:
+            log.error("Ticker error: %s", e)
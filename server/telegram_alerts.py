@@ -12,12 +12,21 @@ Setup:
 """
 
 import os
+import time
+import queue
 import logging
-import requests
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from zoneinfo import ZoneInfo
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 log = logging.getLogger("telegram")
 
 # Config
@@ -26,35 +35,273 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
 BOT_NAME = os.getenv('BOT_NAME', 'S-O Trader')
 TIMEZONE = ZoneInfo('Europe/Berlin')
 
+# Background sender: alerts are queued so Telegram latency never blocks trading
+COALESCE_DEPTH = 5  # merge queued messages once the backlog exceeds this
+MAX_MESSAGE_LEN = 4096  # Telegram hard limit per message
+DEFAULT_RETRY_AFTER = 5  # seconds, if a 429 comes without parameters.retry_after
+MAX_RATE_LIMIT_RETRIES = 3  # 429 retries per message before it is dropped
+MAX_RATE_LIMIT_WAIT = 60  # seconds of 429 back-off per message before it is dropped
+QUEUE_SIZE = 500  # alerts beyond this backlog are dropped rather than held in memory
+_queue: "queue.Queue[tuple]" = queue.Queue(maxsize=QUEUE_SIZE)
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+# Token and chat ID are fixed at import, so the check is too
+_ENABLED = bool(TELEGRAM_BOT_TOKEN) and bool(TELEGRAM_CHAT_ID)
+
 
 def is_enabled() -> bool:
     """Check if Telegram is configured."""
-    return bool(TELEGRAM_BOT_TOKEN) and bool(TELEGRAM_CHAT_ID)
+    return _ENABLED
 
 
-def send_message(text: str, silent: bool = False) -> bool:
-    """Send message to Telegram. Returns True on success."""
-    if not is_enabled():
-        return False
+# Token is fixed for the process lifetime, so build the URL and keep-alive pool once
+_SEND_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+_SESSION = None  # requests.Session, created on first send (keeps requests off the import path)
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 
+def _get_session():
+    """Pooled keep-alive session to api.telegram.org, built on first use."""
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        _SESSION = session
+    return _SESSION
+
+
+def _retry_after(resp) -> float:
+    """Seconds Telegram asks us to wait after a 429 (parameters.retry_after)."""
+    try:
+        return float(resp.json()["parameters"]["retry_after"])
+    except Exception:
+        return DEFAULT_RETRY_AFTER
+
+
+def _post(text: str, silent: bool = False) -> bool:
+    """
+    POST one message to the Telegram API. Returns True on success.
+    Rate-limited (429) sends wait retry_after seconds and try again, up to
+    MAX_RATE_LIMIT_RETRIES times and MAX_RATE_LIMIT_WAIT seconds in total;
+    after that the message is dropped so the sender thread moves on.
+    """
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+        session = _get_session()
         payload = {
             "chat_id": TELEGRAM_CHAT_ID,
             "text": text,
             "parse_mode": "HTML",
             "disable_notification": silent,
         }
-        resp = requests.post(url, json=payload, timeout=10)
+        body = orjson.dumps(payload) if ORJSON_AVAILABLE else None
+        waited = 0.0
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if body is not None:
+                resp = session.post(_SEND_URL, data=body, headers=_JSON_HEADERS, timeout=10)
+            else:
+                resp = session.post(_SEND_URL, json=payload, timeout=10)
+            if resp.status_code != 429:
+                break
+            wait = _retry_after(resp)
+            if attempt == MAX_RATE_LIMIT_RETRIES or waited + wait > MAX_RATE_LIMIT_WAIT:
+                log.warning("Telegram rate limited for too long, dropping message: %.50s", text)
+                return False
+            log.warning("Telegram rate limited, retrying in %.0fs", wait)
+            time.sleep(wait)
+            waited += wait
         if resp.status_code == 200:
-            log.debug(f"Telegram sent: {text[:50]}...")
+            log.debug("Telegram sent: %.50s...", text)
             return True
         else:
-            log.warning(f"Telegram error: {resp.status_code}")
+            log.warning("Telegram error: %s", resp.status_code)
             return False
     except Exception as e:
-        log.warning(f"Telegram failed: {e}")
+        log.warning("Telegram failed: %s", e)
+        return False
+
+
+def _send_loop():
+    """Background worker: drain the queue, merging backlogged messages into one post."""
+    while True:
+        text, silent = _queue.get()
+        if _queue.qsize() > COALESCE_DEPTH:
+            while not _queue.empty():
+                try:
+                    next_text, next_silent = _queue.get_nowait()
+                except queue.Empty:
+                    break
+                if len(text) + len(next_text) + 2 > MAX_MESSAGE_LEN:
+                    _post(text, silent)
+                    text, silent = next_text, next_silent
+                else:
+                    text = f"{text}\n\n{next_text}"
+                    silent = silent and next_silent
+        _post(text, silent)
+
+
+def _ensure_worker():
+    """Start the sender thread on first use (per process, so it survives gunicorn forks)."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_send_loop, name="telegram-sender", daemon=True)
+            _worker.start()
+
+
+def send_message(text: str, silent: bool = False) -> bool:
+    """
+    Queue message for Telegram and return immediately.
+    Returns True if queued; delivery happens on a background thread.
+    """
+    if not _ENABLED:
+        return False
+
+    _ensure_worker()
+    try:
+        _queue.put_nowait((text, silent))
+    except queue.Full:
+        log.warning("Telegram queue full, dropping message: %.50s", text)
         return False
+    return True
+
+
+# ============================================
+# MESSAGE TEMPLATES
+# ============================================
+# Emoji used in alerts (module constants so every message reuses the same str objects)
+_EMOJI_READY = "🟡"
+_EMOJI_CANCELLED = "⚪"
+_EMOJI_LONG = "🟢"
+_EMOJI_SHORT = "🔴"
+_EMOJI_WIN = "✅"
+_EMOJI_LOSS = "❌"
+_EMOJI_UP = "📈"
+_EMOJI_DOWN = "📉"
+_EMOJI_DAILY = "📊"
+_EMOJI_WEEKLY = "📅"
+_EMOJI_BOT = "🤖"
+_EMOJI_LOCK = "🔒"
+_EMOJI_WARN = "⚠️"
+
+# Built once at import; each alert is a single str.format() plus optional lines.
+# The footer is appended rather than formatted so BOT_NAME may contain braces.
+_FOOTER = f"\n\n<i>{BOT_NAME}</i>"
+
+_READY_TPL = (
+    _EMOJI_READY + " <b>READY - Watching</b>\n"
+    "\n"
+    "<b>{symbol}</b> {dir_text}\n"
+    "\n"
+    "Projected Entry: {entry:.6f}\n"
+    "TP: {tp:.6f} ({tp_dist:.2f}%)\n"
+    "SL: {sl:.6f} ({sl_dist:.2f}%)\n"
+    "R:R = 1:{rr:.1f}"
+)
+
+_CANCELLED_TPL = (
+    _EMOJI_CANCELLED + " <b>CANCELLED</b>\n"
+    "\n"
+    "<b>{symbol}</b> {dir_text}\n"
+    "Signal expired without triggering"
+)
+
+_TRADE_OPENED_TPL = (
+    "{emoji} <b>TRADE OPENED</b>\n"
+    "\n"
+    "<b>{symbol}</b> {dir_text}\n"
+    "Leverage: {leverage}x\n"
+    "\n"
+    "Entry: {entry:.6f}\n"
+    "SL: {sl:.6f} ({sl_dist:.2f}%)\n"
+    "TP: {tp:.6f} ({tp_dist:.2f}%)\n"
+    "\n"
+    "Risk: {risk_pct:.1f}%"
+)
+
+_TRADE_CLOSED_TPL = (
+    "{emoji} <b>TRADE CLOSED: {result}</b>\n"
+    "\n"
+    "<b>{symbol}</b> {dir_text}\n"
+    "\n"
+    "Entry: {entry:.6f}\n"
+    "Exit: {exit:.6f}\n"
+    "PnL: <b>{pnl_str}</b>\n"
+    "Exit: {exit_type}"
+)
+
+_DAILY_TPL = (
+    _EMOJI_DAILY + " <b>DAILY REPORT</b>\n"
+    "<i>{date_str}</i>\n"
+    "\n"
+    "Trades Opened: {trades_opened}\n"
+    "Trades Closed: {trades_closed}\n"
+    "\n"
+    "Wins: {wins}\n"
+    "Losses: {losses}\n"
+    "Win Rate: {win_rate:.1f}%\n"
+    "\n"
+    "{emoji} Day PnL: <b>{pnl_str}</b>"
+)
+
+_WEEKLY_TPL = (
+    _EMOJI_WEEKLY + " <b>WEEKLY REPORT</b>\n"
+    "<i>{week_start} - {week_end}</i>\n"
+    "\n"
+    "Total Trades: {trades_closed}\n"
+    "Wins: {wins} | Losses: {losses}\n"
+    "Win Rate: <b>{win_rate:.1f}%</b>\n"
+    "\n"
+    "{emoji} Week PnL: <b>{pnl_str}</b>"
+)
+
+_BOT_STARTED_TPL = (
+    _EMOJI_BOT + " <b>{bot_name} STARTED</b>\n"
+    "\n"
+    "Time: {now}"
+)
+
+_TRAILING_SL_TPL = (
+    _EMOJI_LOCK + " <b>SL MOVED TO PROFIT</b>\n"
+    "\n"
+    "<b>{symbol}</b> {dir_text}\n"
+    "\n"
+    "Entry: {entry:.6f}\n"
+    "Old SL: {old_sl:.6f}\n"
+    "New SL: <b>{new_sl:.6f}</b>\n"
+    "Profit Locked: {profit_locked:.2f}%"
+)
+
+_ERROR_TPL = (
+    _EMOJI_WARN + " <b>ERROR ALERT</b>\n"
+    "\n"
+    "Error: {error}"
+)
+
+
+@lru_cache(maxsize=128)
+def _date_str(year: int, month: int, day: int, with_year: bool = True) -> str:
+    """dd.mm.yyyy (or dd.mm) for a calendar day; only a handful of distinct days ever occur."""
+    if with_year:
+        return f"{day:02d}.{month:02d}.{year}"
+    return f"{day:02d}.{month:02d}"
+
+
+def _fmt_date(now: datetime, days_ago: int = 0, with_year: bool = True) -> str:
+    """Format the calendar day `days_ago` days before `now`."""
+    day = now.date() - timedelta(days=days_ago)
+    return _date_str(day.year, day.month, day.day, with_year)
+
+
+def _signed_pct(value: float) -> str:
+    """Format a percentage with an explicit + for non-negative values."""
+    return f"+{value:.2f}%" if value >= 0 else f"{value:.2f}%"
 
 
 # ============================================
@@ -71,53 +318,32 @@ def send_ready_state(
     zone_width: float = None,
 ) -> bool:
     """Send notification when signal enters READY state (Step 1 triggered)."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
-    emoji = "🟡"
-    dir_text = direction.upper()
-
     sl_dist = abs(entry - sl) / entry * 100
     tp_dist = abs(tp - entry) / entry * 100
     rr = tp_dist / sl_dist if sl_dist > 0 else 0
 
-    lines = [
-        f"{emoji} <b>READY - Watching</b>",
-        "",
-        f"<b>{symbol}</b> {dir_text}",
-        "",
-        f"Projected Entry: {entry:.6f}",
-        f"TP: {tp:.6f} ({tp_dist:.2f}%)",
-        f"SL: {sl:.6f} ({sl_dist:.2f}%)",
-        f"R:R = 1:{rr:.1f}",
-    ]
-
+    text = _READY_TPL.format(
+        symbol=symbol, dir_text=direction.upper(), entry=entry,
+        tp=tp, tp_dist=tp_dist, sl=sl, sl_dist=sl_dist, rr=rr,
+    )
     if atr:
-        lines.append(f"ATR: {atr:.6f}")
+        text += f"\nATR: {atr:.6f}"
     if zone_width:
-        lines.append(f"Zone Width: {zone_width:.6f}")
-
-    lines.append("")
-    lines.append(f"<i>{BOT_NAME}</i>")
+        text += f"\nZone Width: {zone_width:.6f}"
 
-    return send_message("\n".join(lines), silent=True)
+    return send_message(text + _FOOTER, silent=True)
 
 
 def send_ready_cancelled(symbol: str, direction: str) -> bool:
     """Send notification when READY state is cancelled."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
-    lines = [
-        f"⚪ <b>CANCELLED</b>",
-        "",
-        f"<b>{symbol}</b> {direction.upper()}",
-        "Signal expired without triggering",
-        "",
-        f"<i>{BOT_NAME}</i>",
-    ]
-
-    return send_message("\n".join(lines), silent=True)
+    text = _CANCELLED_TPL.format(symbol=symbol, dir_text=direction.upper())
+    return send_message(text + _FOOTER, silent=True)
 
 
 # ============================================
@@ -135,35 +361,21 @@ def send_trade_opened(
     qty: float = None,
 ) -> bool:
     """Send notification when new trade is opened (TRIGGERED)."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
-    emoji = "🔴" if direction.lower() == 'short' else "🟢"
-    dir_text = direction.upper()
-
-    sl_dist = abs(entry_price - sl_price) / entry_price * 100
-    tp_dist = abs(tp_price - entry_price) / entry_price * 100
-
-    lines = [
-        f"{emoji} <b>TRADE OPENED</b>",
-        "",
-        f"<b>{symbol}</b> {dir_text}",
-        f"Leverage: {leverage}x",
-        "",
-        f"Entry: {entry_price:.6f}",
-        f"SL: {sl_price:.6f} ({sl_dist:.2f}%)",
-        f"TP: {tp_price:.6f} ({tp_dist:.2f}%)",
-        "",
-        f"Risk: {risk_pct:.1f}%",
-    ]
-
+    text = _TRADE_OPENED_TPL.format(
+        emoji=_EMOJI_SHORT if direction.lower() == 'short' else _EMOJI_LONG,
+        symbol=symbol, dir_text=direction.upper(), leverage=leverage,
+        entry=entry_price,
+        sl=sl_price, sl_dist=abs(entry_price - sl_price) / entry_price * 100,
+        tp=tp_price, tp_dist=abs(tp_price - entry_price) / entry_price * 100,
+        risk_pct=risk_pct,
+    )
     if qty:
-        lines.append(f"Qty: {qty:.6f}")
-
-    lines.append("")
-    lines.append(f"<i>{BOT_NAME}</i>")
+        text += f"\nQty: {qty:.6f}"
 
-    return send_message("\n".join(lines))
+    return send_message(text + _FOOTER)
 
 
 def send_trade_closed(
@@ -176,26 +388,19 @@ def send_trade_closed(
     duration_mins: int = None,
 ) -> bool:
     """Send notification when trade is closed (EXIT)."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
     is_win = outcome.upper() == "WIN"
-    emoji = "✅" if is_win else "❌"
-    result = "WIN" if is_win else "LOSS"
-    dir_text = direction.upper()
-
-    pnl_str = f"+{pnl_pct:.2f}%" if pnl_pct > 0 else f"{pnl_pct:.2f}%"
-
-    lines = [
-        f"{emoji} <b>TRADE CLOSED: {result}</b>",
-        "",
-        f"<b>{symbol}</b> {dir_text}",
-        "",
-        f"Entry: {entry_price:.6f}",
-        f"Exit: {exit_price:.6f}",
-        f"PnL: <b>{pnl_str}</b>",
-        f"Exit: {'Take Profit' if is_win else 'Stop Loss'}",
-    ]
+
+    text = _TRADE_CLOSED_TPL.format(
+        emoji=_EMOJI_WIN if is_win else _EMOJI_LOSS,
+        result="WIN" if is_win else "LOSS",
+        symbol=symbol, dir_text=direction.upper(),
+        entry=entry_price, exit=exit_price,
+        pnl_str=f"+{pnl_pct:.2f}%" if pnl_pct > 0 else f"{pnl_pct:.2f}%",
+        exit_type='Take Profit' if is_win else 'Stop Loss',
+    )
 
     if duration_mins is not None:
         if duration_mins < 60:
@@ -204,12 +409,9 @@ def send_trade_closed(
             dur_str = f"{duration_mins // 60}h {duration_mins % 60}m"
         else:
             dur_str = f"{duration_mins // 1440}d {(duration_mins % 1440) // 60}h"
-        lines.append(f"Duration: {dur_str}")
-
-    lines.append("")
-    lines.append(f"<i>{BOT_NAME}</i>")
+        text += f"\nDuration: {dur_str}"
 
-    return send_message("\n".join(lines))
+    return send_message(text + _FOOTER)
 
 
 # ============================================
@@ -227,42 +429,28 @@ def send_daily_summary(
     equity_change_pct: float = None,
 ) -> bool:
     """Send daily summary."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
     now = datetime.now(TIMEZONE)
-    date_str = (now - timedelta(days=1)).strftime("%d.%m.%Y")
-
-    win_rate = (wins / trades_closed * 100) if trades_closed > 0 else 0
-    emoji = "📈" if total_pnl_pct >= 0 else "📉"
-    pnl_str = f"+{total_pnl_pct:.2f}%" if total_pnl_pct >= 0 else f"{total_pnl_pct:.2f}%"
-
-    lines = [
-        f"📊 <b>DAILY REPORT</b>",
-        f"<i>{date_str}</i>",
-        "",
-        f"Trades Opened: {trades_opened}",
-        f"Trades Closed: {trades_closed}",
-        "",
-        f"Wins: {wins}",
-        f"Losses: {losses}",
-        f"Win Rate: {win_rate:.1f}%",
-        "",
-        f"{emoji} Day PnL: <b>{pnl_str}</b>",
-    ]
+
+    text = _DAILY_TPL.format(
+        date_str=_fmt_date(now, 1),
+        trades_opened=trades_opened, trades_closed=trades_closed,
+        wins=wins, losses=losses,
+        win_rate=(wins / trades_closed * 100) if trades_closed > 0 else 0,
+        emoji=_EMOJI_UP if total_pnl_pct >= 0 else _EMOJI_DOWN,
+        pnl_str=_signed_pct(total_pnl_pct),
+    )
 
     if best_trade_pct is not None:
-        lines.append(f"Best Trade: +{best_trade_pct:.2f}%")
+        text += f"\nBest Trade: +{best_trade_pct:.2f}%"
     if worst_trade_pct is not None:
-        lines.append(f"Worst Trade: {worst_trade_pct:.2f}%")
+        text += f"\nWorst Trade: {worst_trade_pct:.2f}%"
     if equity_change_pct is not None:
-        eq_str = f"+{equity_change_pct:.2f}%" if equity_change_pct >= 0 else f"{equity_change_pct:.2f}%"
-        lines.append(f"Equity: {eq_str}")
-
-    lines.append("")
-    lines.append(f"<i>{BOT_NAME}</i>")
+        text += f"\nEquity: {_signed_pct(equity_change_pct)}"
 
-    return send_message("\n".join(lines))
+    return send_message(text + _FOOTER)
 
 
 def send_weekly_summary(
@@ -275,40 +463,28 @@ def send_weekly_summary(
     equity_change_pct: float = None,
 ) -> bool:
     """Send weekly summary."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
     now = datetime.now(TIMEZONE)
-    week_start = (now - timedelta(days=7)).strftime("%d.%m")
-    week_end = (now - timedelta(days=1)).strftime("%d.%m.%Y")
-
-    win_rate = (wins / trades_closed * 100) if trades_closed > 0 else 0
-    emoji = "📈" if total_pnl_pct >= 0 else "📉"
-    pnl_str = f"+{total_pnl_pct:.2f}%" if total_pnl_pct >= 0 else f"{total_pnl_pct:.2f}%"
-
-    lines = [
-        f"📅 <b>WEEKLY REPORT</b>",
-        f"<i>{week_start} - {week_end}</i>",
-        "",
-        f"Total Trades: {trades_closed}",
-        f"Wins: {wins} | Losses: {losses}",
-        f"Win Rate: <b>{win_rate:.1f}%</b>",
-        "",
-        f"{emoji} Week PnL: <b>{pnl_str}</b>",
-    ]
+
+    text = _WEEKLY_TPL.format(
+        week_start=_fmt_date(now, 7, with_year=False),
+        week_end=_fmt_date(now, 1),
+        trades_closed=trades_closed, wins=wins, losses=losses,
+        win_rate=(wins / trades_closed * 100) if trades_closed > 0 else 0,
+        emoji=_EMOJI_UP if total_pnl_pct >= 0 else _EMOJI_DOWN,
+        pnl_str=_signed_pct(total_pnl_pct),
+    )
 
     if avg_win_pct is not None:
-        lines.append(f"Avg Win: +{avg_win_pct:.2f}%")
+        text += f"\nAvg Win: +{avg_win_pct:.2f}%"
     if avg_loss_pct is not None:
-        lines.append(f"Avg Loss: {avg_loss_pct:.2f}%")
+        text += f"\nAvg Loss: {avg_loss_pct:.2f}%"
     if equity_change_pct is not None:
-        eq_str = f"+{equity_change_pct:.2f}%" if equity_change_pct >= 0 else f"{equity_change_pct:.2f}%"
-        lines.append(f"Equity Change: {eq_str}")
+        text += f"\nEquity Change: {_signed_pct(equity_change_pct)}"
 
-    lines.append("")
-    lines.append(f"<i>{BOT_NAME}</i>")
-
-    return send_message("\n".join(lines))
+    return send_message(text + _FOOTER)
 
 
 # ============================================
@@ -317,71 +493,46 @@ def send_weekly_summary(
 
 def send_bot_started(equity: float = None, active_positions: int = 0) -> bool:
     """Send notification when server starts."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
-    now = datetime.now(TIMEZONE).strftime("%H:%M %d.%m.%Y")
-
-    lines = [
-        f"🤖 <b>{BOT_NAME} STARTED</b>",
-        "",
-        f"Time: {now}",
-    ]
+    now = datetime.now(TIMEZONE)
+    text = _BOT_STARTED_TPL.format(
+        bot_name=BOT_NAME,
+        now=f"{now.hour:02d}:{now.minute:02d} {_fmt_date(now)}",
+    )
 
     if equity:
-        lines.append(f"Equity: ${equity:.2f}")
+        text += f"\nEquity: ${equity:.2f}"
     if active_positions > 0:
-        lines.append(f"Active Positions: {active_positions}")
-
-    lines.append("")
-    lines.append("Webhook server ready!")
+        text += f"\nActive Positions: {active_positions}"
 
-    return send_message("\n".join(lines))
+    return send_message(text + "\n\nWebhook server ready!")
 
 
 def send_trailing_sl_moved(symbol: str, direction: str, old_sl: float, new_sl: float, entry: float) -> bool:
     """Send notification when trailing SL is activated."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
-    emoji = "🔒"
-    dir_text = direction.upper()
-    profit_locked = abs(new_sl - entry) / entry * 100
-
-    lines = [
-        f"{emoji} <b>SL MOVED TO PROFIT</b>",
-        "",
-        f"<b>{symbol}</b> {dir_text}",
-        "",
-        f"Entry: {entry:.6f}",
-        f"Old SL: {old_sl:.6f}",
-        f"New SL: <b>{new_sl:.6f}</b>",
-        f"Profit Locked: {profit_locked:.2f}%",
-        "",
-        f"<i>{BOT_NAME}</i>",
-    ]
-
-    return send_message("\n".join(lines))
+    text = _TRAILING_SL_TPL.format(
+        symbol=symbol, dir_text=direction.upper(),
+        entry=entry, old_sl=old_sl, new_sl=new_sl,
+        profit_locked=abs(new_sl - entry) / entry * 100,
+    )
+    return send_message(text + _FOOTER)
 
 
 def send_error_alert(error: str, context: str = None) -> bool:
     """Send alert for critical errors."""
-    if not is_enabled():
+    if not _ENABLED:
         return False
 
-    lines = [
-        f"⚠️ <b>ERROR ALERT</b>",
-        "",
-        f"Error: {error[:200]}",
-    ]
-
+    text = _ERROR_TPL.format(error=error[:200])
     if context:
-        lines.append(f"Context: {context}")
-
-    lines.append("")
-    lines.append(f"<i>{BOT_NAME}</i>")
+        text += f"\nContext: {context}"
 
-    return send_message("\n".join(lines))
+    return send_message(text + _FOOTER)
 
 
 def send_test() -> bool:
@@ -390,8 +541,9 @@ def send_test() -> bool:
         print("[Telegram] Not configured - set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID")
         return False
 
-    return send_message(
-        f"✅ <b>Test Message</b>\n\n"
+    # Sent synchronously so the result is known before the process exits
+    return _post(
+        f"{_EMOJI_WIN} <b>Test Message</b>\n\n"
         f"Telegram alerts are working!\n\n"
         f"<i>{BOT_NAME}</i>"
     )
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Server modules are flat top-level modules (see Dockerfile WORKDIR); make them importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
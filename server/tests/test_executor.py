@@ -0,0 +1,169 @@
+import pytest
+import requests
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from executor import CircuitBreaker, _round_to_step, _step_decimals, _step_inverse
+
+
+@pytest.mark.parametrize("step, expected", [
+    (0.001, 1000),
+    (0.1, 10),
+    (0.25, 4),
+    (1, None),
+    (5, None),
+    (0, None),
+    (0.3, None),  # not 1/n
+])
+def test_step_inverse(step, expected):
+    assert _step_inverse(step) == expected
+
+
+@pytest.mark.parametrize("value, step, expected", [
+    (0.30000000000000004, 0.1, 0.3),
+    (1.23456, 0.001, 1.235),
+    (1.2344, 0.001, 1.234),
+    (7.3, 0.25, 7.25),
+    (12, 5, 10),
+])
+def test_round_to_step(value, step, expected):
+    assert _round_to_step(value, step) == expected
+
+
+def test_round_to_step_with_precomputed_inverse_matches():
+    for value in (0.1234, 5.55555, 1e-3, 99.9995):
+        assert _round_to_step(value, 0.001, 1000) == _round_to_step(value, 0.001)
+
+
+@pytest.mark.parametrize("step, expected", [
+    (0.001, 3),
+    (0.25, 2),
+    (0.5, 1),
+    (1.0, 0),
+    (10, 0),
+    (1e-8, 8),
+])
+def test_step_decimals(step, expected):
+    assert _step_decimals(step) == expected
+
+
+def test_breaker_opens_after_fail_max_consecutive_failures():
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+
+def test_breaker_success_resets_the_count():
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()  # trial call
+    breaker.reset_timeout = 60
+    assert not breaker.allow()  # re-armed: nobody else until the trial reports
+    breaker.record_success()
+    assert breaker.allow() and not breaker.is_open
+
+
+def test_breaker_failed_trial_stays_open():
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    breaker.reset_timeout = 60
+    assert breaker.is_open and not breaker.allow()
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize("exc", [
+    requests.ConnectionError(),
+    requests.ReadTimeout(),
+    _http_error(502),
+    FailedRequestError("req", "Retries exceeded", 400, "t", None),
+    FailedRequestError("req", "Server error", 503, "t", None),
+])
+def test_breaker_counts_transport_errors(exc):
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=60)
+    breaker.record_outcome(exc)
+    assert breaker.is_open
+
+
+@pytest.mark.parametrize("exc", [
+    InvalidRequestError("req", "symbol invalid", 10001, "t", None),
+    _http_error(401),
+    FailedRequestError("req", "Forbidden", 403, "t", None),
+    KeyError("qty_step"),
+])
+def test_breaker_ignores_rejections_and_local_errors(exc):
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=60)
+    breaker.record_outcome(exc)
+    assert not breaker.is_open
+
+
+def test_breaker_rejection_counts_as_bybit_answering():
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_outcome(InvalidRequestError("req", "params error", 10001, "t", None))
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+class FailingClient:
+    """pybit HTTP stand-in whose calls all fail with the given exception"""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+    def __getattr__(self, name):
+        def call(**kwargs):
+            raise self.exc
+        return call
+
+
+def _executor_with(client):
+    from executor import BybitExecutor
+    executor = BybitExecutor()
+    executor.__dict__['client'] = client  # bypass the cached_property
+    executor.__dict__['trade'] = client
+    return executor
+
+
+def test_get_all_positions_failure_is_none_not_flat():
+    executor = _executor_with(FailingClient(requests.ConnectionError()))
+    assert executor.get_all_positions() is None
+
+
+def test_trailing_sl_updates_feed_the_breaker():
+    executor = _executor_with(FailingClient(requests.ReadTimeout()))
+    for _ in range(executor.breaker.fail_max):
+        assert not executor.update_stop_loss('BTCUSDT', 'Buy', 100.0)
+    assert executor.breaker.is_open
+
+
+def test_order_rejections_do_not_trip_the_breaker():
+    executor = _executor_with(FailingClient(InvalidRequestError("req", "order not exists", 110001, "t", None)))
+    for _ in range(executor.breaker.fail_max):
+        assert not executor.cancel_order('BTCUSDT', 'abc')
+        assert not executor.close_position('BTCUSDT')
+    assert not executor.breaker.is_open
+
+
+def test_snapshot_failures_feed_the_breaker():
+    executor = _executor_with(FailingClient(requests.ConnectionError()))
+    executor.breaker.fail_max = 3
+    snap = executor.snapshot()  # wallet, positions and orders all fail
+    assert not snap.positions_ok
+    assert executor.breaker.is_open
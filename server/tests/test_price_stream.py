@@ -0,0 +1,108 @@
+import pytest
+
+import price_stream
+from price_stream import PriceStream
+
+
+class FakeWebSocket:
+    """pybit WebSocket stand-in: one callback per topic, duplicates rejected"""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.requests = []  # symbol argument of each ticker_stream call
+
+    def ticker_stream(self, symbol, callback):
+        self.requests.append(symbol)
+        topics = [f"tickers.{s}" for s in ([symbol] if isinstance(symbol, str) else symbol)]
+        for topic in topics:
+            if topic in self.callbacks:
+                raise Exception("You have already subscribed to this topic.")
+        for topic in topics:
+            self.callbacks[topic] = callback
+
+    def unsubscribe(self, topic):
+        del self.callbacks[topic]
+
+    def tick(self, symbol, price):
+        self.callbacks[f"tickers.{symbol}"]({'data': {'symbol': symbol, 'lastPrice': str(price)}})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(price_stream, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def stream():
+    stream = PriceStream()
+    stream.ws = FakeWebSocket()
+    return stream
+
+
+def test_subscribes_one_topic_per_request(stream, clock):
+    stream.subscribe('BTCUSDT')
+    stream.subscribe('ETHUSDT')
+    stream.subscribe('BTCUSDT')  # already subscribed: no request
+    assert stream.ws.requests == ['BTCUSDT', 'ETHUSDT']
+    stream.ws.tick('BTCUSDT', 100)
+    assert stream.price('BTCUSDT') == 100
+
+
+def test_unsubscribe_leaves_other_symbols_streaming(stream, clock):
+    stream.subscribe('BTCUSDT')
+    stream.subscribe('ETHUSDT')
+    stream.unsubscribe('BTCUSDT')
+    assert set(stream.ws.callbacks) == {'tickers.ETHUSDT'}
+    stream.ws.tick('ETHUSDT', 2000)
+    assert stream.price('ETHUSDT') == 2000
+    assert stream.price('BTCUSDT') is None
+
+
+def test_resubscribe_after_unsubscribe(stream, clock):
+    stream.subscribe('BTCUSDT')
+    stream.ws.tick('BTCUSDT', 100)
+    stream.unsubscribe('BTCUSDT')
+    stream.subscribe('BTCUSDT')
+    assert stream.ws.requests == ['BTCUSDT', 'BTCUSDT']
+    assert stream.price('BTCUSDT') is None  # old price was forgotten
+    stream.ws.tick('BTCUSDT', 101)
+    assert stream.price('BTCUSDT') == 101
+
+
+def test_stale_price_falls_back_to_none(stream, clock):
+    stream.subscribe('BTCUSDT')
+    stream.ws.tick('BTCUSDT', 100)
+    clock.now += price_stream.PRICE_STALE_SEC + 1
+    assert stream.price('BTCUSDT') is None
+    stream.ws.tick('BTCUSDT', 102)
+    assert stream.price('BTCUSDT') == 102
+
+
+def test_ticks_for_unwanted_symbols_are_ignored(stream, clock):
+    stream.subscribe('BTCUSDT')
+    callback = stream.ws.callbacks['tickers.BTCUSDT']
+    stream.unsubscribe('BTCUSDT')
+    callback({'data': {'symbol': 'BTCUSDT', 'lastPrice': '100'}})  # in flight during unsubscribe
+    assert stream.price('BTCUSDT') is None
+
+
+def test_connect_subscribes_wanted_symbols_one_by_one(monkeypatch, clock):
+    import pybit.unified_trading
+    monkeypatch.setattr(pybit.unified_trading, "WebSocket", lambda **kwargs: FakeWebSocket())
+    stream = PriceStream()
+    stream.subscribe('BTCUSDT')  # before the socket exists: remembered only
+    stream.subscribe('ETHUSDT')
+    stream._connect()
+    assert sorted(stream.ws.requests) == ['BTCUSDT', 'ETHUSDT']
+    stream.unsubscribe('BTCUSDT')
+    assert set(stream.ws.callbacks) == {'tickers.ETHUSDT'}
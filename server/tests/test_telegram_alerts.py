@@ -0,0 +1,68 @@
+import queue
+
+import pytest
+
+import telegram_alerts
+
+
+class FakeResponse:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self._retry_after = retry_after
+
+    def json(self):
+        return {"parameters": {"retry_after": self._retry_after}}
+
+
+class FakeSession:
+    """Answers posts with the given responses in order"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.posts = 0
+
+    def post(self, url, **kwargs):
+        self.posts += 1
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waited = []
+    monkeypatch.setattr(telegram_alerts.time, "sleep", waited.append)
+    return waited
+
+
+def _use(monkeypatch, session):
+    monkeypatch.setattr(telegram_alerts, "_SESSION", session)
+    return session
+
+
+def test_post_retries_after_rate_limit(monkeypatch, sleeps):
+    session = _use(monkeypatch, FakeSession(FakeResponse(429, 2), FakeResponse(200)))
+    assert telegram_alerts._post("hello")
+    assert session.posts == 2
+    assert sleeps == [2.0]
+
+
+def test_post_gives_up_after_max_retries(monkeypatch, sleeps):
+    responses = [FakeResponse(429, 1)] * (telegram_alerts.MAX_RATE_LIMIT_RETRIES + 2)
+    session = _use(monkeypatch, FakeSession(*responses))
+    assert not telegram_alerts._post("hello")
+    assert session.posts == telegram_alerts.MAX_RATE_LIMIT_RETRIES + 1
+    assert len(sleeps) == telegram_alerts.MAX_RATE_LIMIT_RETRIES
+
+
+def test_post_gives_up_when_wait_exceeds_budget(monkeypatch, sleeps):
+    session = _use(monkeypatch, FakeSession(FakeResponse(429, telegram_alerts.MAX_RATE_LIMIT_WAIT + 1)))
+    assert not telegram_alerts._post("hello")
+    assert session.posts == 1
+    assert sleeps == []
+
+
+def test_send_message_drops_when_queue_full(monkeypatch):
+    monkeypatch.setattr(telegram_alerts, "_ENABLED", True)
+    monkeypatch.setattr(telegram_alerts, "_ensure_worker", lambda: None)
+    monkeypatch.setattr(telegram_alerts, "_queue", queue.Queue(maxsize=1))
+    assert telegram_alerts.send_message("first")
+    assert not telegram_alerts.send_message("second")
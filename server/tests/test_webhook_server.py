@@ -0,0 +1,337 @@
+import hashlib
+import hmac
+
+import pytest
+
+import webhook_server as ws
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    key = b"test-secret"
+    monkeypatch.setattr(ws, "_HMAC_TEMPLATE", hmac.new(key, None, hashlib.sha256))
+    return key
+
+
+def _sign(key: bytes, payload: bytes) -> str:
+    return hmac.new(key, payload, hashlib.sha256).hexdigest()
+
+
+def test_verify_webhook_accepts_valid_signature(secret):
+    payload = b'{"type": "READY"}'
+    assert ws.verify_webhook(payload, _sign(secret, payload))
+    # The template is copied, not consumed: a second request verifies too
+    assert ws.verify_webhook(payload, _sign(secret, payload))
+
+
+def test_verify_webhook_rejects_bad_signatures(secret):
+    payload = b'{"type": "READY"}'
+    assert not ws.verify_webhook(payload, _sign(b"other", payload))
+    assert not ws.verify_webhook(b'{"type": "EXIT"}', _sign(secret, payload))
+    assert not ws.verify_webhook(payload, "not-hex")
+    assert not ws.verify_webhook(payload, "")
+
+
+def test_verify_webhook_without_secret_allows_all(monkeypatch):
+    monkeypatch.setattr(ws, "_HMAC_TEMPLATE", None)
+    assert ws.verify_webhook(b"anything", "")
+
+
+ALERT = {'coin': 'BTC', 'direction': 'long', 'entry': 100.5, 'sl': 99, 'time': 1700000000}
+
+
+@pytest.fixture
+def local_dedup(monkeypatch):
+    monkeypatch.setattr(ws, "_redis", None)
+    monkeypatch.setattr(ws, "_seen_events", ws.TTLCache(maxsize=100, ttl=60))
+
+
+def test_webhook_event_id_is_stable_per_alert():
+    assert ws.webhook_event_id('TRIGGERED', ALERT) == ws.webhook_event_id('TRIGGERED', dict(ALERT))
+    # Legacy alerts name the coin "symbol"
+    legacy = dict(ALERT, symbol=ALERT['coin'])
+    del legacy['coin']
+    assert ws.webhook_event_id('TRIGGERED', legacy) == ws.webhook_event_id('TRIGGERED', ALERT)
+
+
+@pytest.mark.parametrize("change", [
+    {'entry': 101}, {'sl': 98}, {'direction': 'short'}, {'coin': 'ETH'}, {'time': 1700000060},
+])
+def test_webhook_event_id_differs_per_field(change):
+    assert ws.webhook_event_id('TRIGGERED', dict(ALERT, **change)) != ws.webhook_event_id('TRIGGERED', ALERT)
+
+
+def test_webhook_event_id_differs_per_type():
+    assert ws.webhook_event_id('READY', ALERT) != ws.webhook_event_id('TRIGGERED', ALERT)
+
+
+def test_claim_event_once_until_released(local_dedup):
+    event_id = ws.webhook_event_id('TRIGGERED', ALERT)
+    assert ws.claim_event(event_id)
+    assert not ws.claim_event(event_id)
+    ws.release_event(event_id)
+    assert ws.claim_event(event_id)
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    monkeypatch.setattr(ws, "open_counts", {'buy': 0, 'sell': 0})
+    monkeypatch.setattr(ws, "open_positions", {})
+    return ws.open_counts
+
+
+def test_reserve_open_claims_until_limit(slots):
+    assert ws.reserve_open('BTCUSDT', 'buy', 2) is None
+    assert ws.reserve_open('ETHUSDT', 'buy', 2) is None
+    assert ws.reserve_open('SOLUSDT', 'buy', 2) == 'max_longs_reached'
+    assert ws.reserve_open('SOLUSDT', 'sell', 1) is None
+    assert ws.reserve_open('XRPUSDT', 'sell', 1) == 'max_shorts_reached'
+    assert slots == {'buy': 2, 'sell': 1}
+
+
+def test_reserve_open_one_position_per_symbol(slots):
+    assert ws.reserve_open('BTCUSDT', 'buy', 5) is None
+    assert ws.reserve_open('BTCUSDT', 'buy', 5) == 'duplicate_position'
+    assert ws.reserve_open('BTCUSDT', 'sell', 5) == 'duplicate_position'
+    assert slots == {'buy': 1, 'sell': 0}
+
+
+def test_record_closed_releases_slot(slots):
+    ws.reserve_open('BTCUSDT', 'buy', 1)
+    ws.record_closed('BTCUSDT')
+    assert slots == {'buy': 0, 'sell': 0}
+    assert ws.reserve_open('BTCUSDT', 'buy', 1) is None
+    # Releasing an unknown symbol is a no-op
+    ws.record_closed('ETHUSDT')
+    assert slots == {'buy': 1, 'sell': 0}
+
+
+def test_resync_open_positions_replaces_counts(slots, monkeypatch):
+    from executor import Position
+    monkeypatch.setattr(ws, "_open_synced_at", float('-inf'))
+    ws.reserve_open('DOGEUSDT', 'buy', 5)
+    ws.resync_open_positions([
+        Position('BTCUSDT', 'Buy', 1, 100, 10, 0),
+        Position('BTCUSDT', 'Sell', 1, 100, 10, 0),  # hedge mode: one slot per symbol
+        Position('ETHUSDT', 'Sell', 2, 50, 10, 0),
+    ])
+    assert ws.open_counts == {'buy': 1, 'sell': 1}
+    assert ws.open_positions == {'BTCUSDT': 'buy', 'ETHUSDT': 'sell'}
+
+
+class RecordingCache(ws.TTLCache):
+    """TTLCache that remembers what its _dropped hook saw"""
+
+    def __init__(self, maxsize=10, ttl=60):
+        super().__init__(maxsize, ttl)
+        self.dropped = []
+
+    def _dropped(self, keys):
+        self.dropped.extend(keys)
+
+
+def test_ttl_cache_get_set():
+    cache = RecordingCache()
+    cache['a'] = 1
+    assert cache['a'] == 1 and cache.get('a') == 1 and 'a' in cache
+    assert cache.get('missing', 'x') == 'x' and 'missing' not in cache
+    with pytest.raises(KeyError):
+        cache['missing']
+
+
+def test_ttl_cache_expired_entries_are_gone():
+    cache = RecordingCache()
+    cache.set('old', 1, ttl=0)  # already expired
+    cache.set('new', 2)
+    assert 'old' not in cache
+    assert cache.items() == [('new', 2)]
+    assert cache.keys() == ['new']
+    assert cache.dropped == ['old']  # reported once, by the lookup that found it expired
+
+
+def test_ttl_cache_expire_sweeps_and_reports():
+    cache = RecordingCache()
+    cache.set('a', 1, ttl=0)
+    cache.set('b', 2, ttl=0)
+    cache.set('c', 3)
+    assert cache.expire() == 2
+    assert sorted(cache.dropped) == ['a', 'b']
+    assert len(cache) == 1
+
+
+def test_ttl_cache_evicts_oldest_beyond_maxsize():
+    cache = RecordingCache(maxsize=2)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache['a'] = 10  # re-set moves 'a' to the newest position
+    cache['c'] = 3
+    assert cache.keys() == ['a', 'c']
+    assert cache.dropped == ['b']
+
+
+def test_ttl_cache_add_only_over_missing_or_expired():
+    cache = RecordingCache()
+    assert cache.add('k', 1)
+    assert not cache.add('k', 2)
+    assert cache['k'] == 1
+    cache.set('k', 1, ttl=0)
+    assert cache.add('k', 3)
+    assert cache['k'] == 3
+
+
+def test_ttl_cache_pop_ignores_expired():
+    cache = RecordingCache()
+    cache['live'] = 1
+    cache.set('dead', 2, ttl=0)
+    assert cache.pop('live') == 1 and 'live' not in cache
+    assert cache.pop('dead', 'gone') == 'gone'
+    assert cache.dropped == []  # pop is not expiry/eviction
+
+
+class FakeRedisHashes:
+    """The hash commands SnapshotTTLCache uses, with redis-py's bytes keys"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key.encode()] = value.encode()
+
+    def hdel(self, name, *keys):
+        for key in keys:
+            self.hashes.get(name, {}).pop(key if isinstance(key, bytes) else key.encode(), None)
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedisHashes()
+    monkeypatch.setattr(ws, "_redis", fake)
+    return fake
+
+
+def test_snapshot_cache_restores_live_entries(fake_redis):
+    from datetime import datetime, timedelta
+    now = datetime.utcnow()
+    cache = ws.SnapshotTTLCache('test', maxsize=10, ttl=3600, time_field='time')
+    cache['LONG_BTCUSDT'] = {'time': now - timedelta(minutes=5), 'atr': 1.5}
+    cache['LONG_ETHUSDT'] = {'time': now - timedelta(hours=2), 'atr': 0.5}  # past ttl on restore
+
+    restored = ws.SnapshotTTLCache('test', maxsize=10, ttl=3600, time_field='time')
+    assert restored.restore() == 1
+    value = restored['LONG_BTCUSDT']
+    assert value['atr'] == 1.5
+    assert value['time'] == now - timedelta(minutes=5)  # back to a datetime
+    assert 'LONG_ETHUSDT' not in restored
+    # Stale entries are deleted from the snapshot too
+    assert list(fake_redis.hgetall('so:test')) == [b'LONG_BTCUSDT']
+
+
+def test_snapshot_cache_pop_and_save_reach_redis(fake_redis):
+    from datetime import datetime
+    cache = ws.SnapshotTTLCache('test', maxsize=10, ttl=3600, time_field='created_at')
+    cache['order1'] = {'created_at': datetime.utcnow(), 'trade_id': None}
+    cache['order1']['trade_id'] = 'abc'
+    cache.save('order1')
+    assert b'"abc"' in fake_redis.hgetall('so:test')[b'order1']
+    cache.pop('order1')
+    assert fake_redis.hgetall('so:test') == {}
+
+
+def test_snapshot_cache_without_redis_is_plain(monkeypatch):
+    monkeypatch.setattr(ws, "_redis", None)
+    cache = ws.SnapshotTTLCache('test', maxsize=10, ttl=3600, time_field='time')
+    cache['k'] = {'time': None}
+    assert cache.restore() == 0
+    assert cache['k'] == {'time': None}
+
+
+def test_resync_with_failed_fetch_keeps_counts(slots, monkeypatch):
+    monkeypatch.setattr(ws, "_open_synced_at", 123.0)
+    ws.reserve_open('BTCUSDT', 'buy', 5)
+    ws.resync_open_positions(None)
+    assert ws.open_counts == {'buy': 1, 'sell': 0}
+    assert ws.open_positions == {'BTCUSDT': 'buy'}
+    assert ws._open_synced_at == 123.0  # not stamped, so the next trigger retries
+
+
+class FakeExecutor:
+    """Just enough of BybitExecutor for handle_triggered up to the entry decision"""
+
+    def __init__(self, positions=(), positions_delay=0.0, breaker_open=False):
+        from executor import CircuitBreaker
+        self.breaker = CircuitBreaker(fail_max=1, reset_timeout=60)
+        if breaker_open:
+            self.breaker.record_failure()
+        self.positions = list(positions)
+        self.positions_delay = positions_delay
+        self.calls = []
+
+    def get_all_positions(self):
+        import time
+        time.sleep(self.positions_delay)
+        return self.positions
+
+    def get_account_equity(self):
+        self.calls.append('equity')
+        return 0  # stop handle_triggered before sizing and ordering
+
+    def get_symbol_info(self, symbol):
+        self.calls.append('symbol_info')
+        return {}
+
+
+TRIGGER = {'coin': 'BTC', 'direction': 'long', 'entry': 100, 'sl': 99, 'tp': 102}
+
+
+@pytest.fixture
+def triggered(monkeypatch, slots):
+    """Run handle_triggered against a FakeExecutor; returns (status code, READY context left)"""
+    from datetime import datetime
+    monkeypatch.setattr(ws, "init_executor", lambda: None)
+    monkeypatch.setattr(ws, "_redis", None)
+    monkeypatch.setattr(ws, "ready_states", ws.SnapshotTTLCache('test', 10, 3600, 'time'))
+    monkeypatch.setattr(ws, "create_shadow_trade", lambda *args: 'shadow-id')
+    monkeypatch.setattr(ws, "calculate_signal_score", lambda *args: 0.0)
+    monkeypatch.setattr(ws, "get_cached_winrate", lambda symbol: {'wins': 0, 'total': 0})
+
+    def run(executor, synced_at=float('-inf')):
+        monkeypatch.setattr(ws, "executor", executor)
+        monkeypatch.setattr(ws, "_open_synced_at", synced_at)
+        ws.ready_states['LONG_BTCUSDT'] = {'time': datetime.utcnow(), 'atr': 1.5}
+        with ws.app.app_context():
+            _, code = ws.handle_triggered(dict(TRIGGER))
+        return code, ws.ready_states.get('LONG_BTCUSDT')
+    return run
+
+
+def test_triggered_with_open_breaker_keeps_ready_context(triggered):
+    code, context = triggered(FakeExecutor(breaker_open=True))
+    assert code == 503
+    assert context['atr'] == 1.5
+
+
+def test_triggered_positions_timeout_keeps_ready_context(triggered, monkeypatch):
+    monkeypatch.setattr(ws, "TRIGGER_IO_TIMEOUT", 0.01)
+    code, context = triggered(FakeExecutor(positions_delay=0.2))
+    assert code == 504
+    assert context['atr'] == 1.5
+
+
+def test_triggered_blocked_entry_skips_equity_and_symbol_info(triggered, monkeypatch):
+    ws.reserve_open('BTCUSDT', 'buy', 5)  # already holding BTCUSDT
+    executor = FakeExecutor()
+    code, context = triggered(executor, synced_at=float('inf'))  # no resync due
+    assert code == 200
+    assert executor.calls == []
+    assert context is None  # consumed by the shadow entry
+
+
+def test_triggered_entry_fetches_equity_and_symbol_info(triggered):
+    executor = FakeExecutor()
+    code, _ = triggered(executor)
+    assert code == 500  # FakeExecutor reports no equity
+    assert sorted(executor.calls) == ['equity', 'symbol_info']
+    assert ws.open_counts == {'buy': 0, 'sell': 0}  # slot released
@@ -2,11 +2,21 @@
 S-O Trading System - Supabase Trade Logger
 ============================================
 Logs all trades to Supabase for tracking and dashboard analytics.
+
+Writes are queued and flushed by a background thread, so the webhook
+never waits on a Supabase round trip; reads stay synchronous.
 """
 
 import os
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import Future
+from operator import attrgetter
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 
 try:
@@ -14,7 +24,84 @@ try:
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
-    print("[WARN] supabase not installed - trade logging disabled")
+
+log = logging.getLogger("trade_logger")
+
+if not SUPABASE_AVAILABLE:
+    log.warning("supabase not installed - trade logging disabled")
+
+# Pending writes beyond this are dropped rather than blocking the webhook
+WRITE_QUEUE_SIZE = 1024
+# Max queued writes handled per flush
+WRITE_BATCH_SIZE = 100
+# How long the writer waits for more rows before flushing a partial batch
+WRITE_FLUSH_INTERVAL = 0.05
+
+_STOP = object()
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+
+
+def _resolve(future: Optional[Future], trade_id: Optional[str]):
+    """Resolve a log_entry Future (writes without one are fire-and-forget)"""
+    if future is not None:
+        future.set_result(trade_id)
+
+
+def _epoch_us(dt: datetime) -> int:
+    """Exact epoch microseconds; naive datetimes are taken as UTC (datetime.utcnow())"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // _ONE_US
+
+# (is_asian, is_london, is_ny) per UTC hour; London and NY overlap 13-16
+_SESSION = tuple((0 <= h < 8, 8 <= h < 16, 13 <= h < 21) for h in range(24))
+
+_SESSION_KEYS = ('is_asian_session', 'is_london_session', 'is_ny_session')
+
+# (column, getter) for each TradeRecord field written by log_entry
+_TRADE_FIELDS = (
+    ('symbol', attrgetter('symbol')),
+    ('direction', attrgetter('direction')),
+    ('entry_price', lambda t: float(t.entry_price)),
+    ('entry_time', lambda t: t.entry_time.isoformat()),
+    ('entry_time_us', lambda t: _epoch_us(t.entry_time)),
+    ('qty', lambda t: float(t.qty)),
+    ('leverage', attrgetter('leverage')),
+    ('margin_used', lambda t: float(t.margin_used)),
+    ('equity_at_entry', lambda t: float(t.equity_at_entry)),
+    ('sl_price', lambda t: float(t.sl_price)),
+    ('tp_price', lambda t: float(t.tp_price)),
+    ('order_id', attrgetter('order_id')),
+    ('risk_pct', attrgetter('risk_pct')),
+    ('risk_amount', attrgetter('risk_amount')),
+
+    # RZ/ATR features
+    ('atr_value', attrgetter('atr_value')),
+    ('zone_width', attrgetter('zone_width')),
+    ('bars_in_ready', attrgetter('bars_in_ready')),
+)
+
+# Columns handle_exit reads from find_open_trade()
+_OPEN_TRADE_COLUMNS = 'id,entry_price,entry_time,margin_used,equity_at_entry,leverage'
+
+
+def _pool_postgrest(client: "Client"):
+    """
+    Swap the PostgREST client's httpx session for one with a bounded
+    keep-alive pool, so bursts of queries reuse warm TLS connections.
+    """
+    import httpx
+
+    postgrest = client.postgrest
+    old = postgrest.session
+    postgrest.session = httpx.Client(
+        base_url=old.base_url,
+        headers=old.headers,
+        timeout=old.timeout,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=20, keepalive_expiry=1800),
+    )
+    old.close()
 
 
 @dataclass
@@ -69,76 +156,162 @@ class TradeLogger:
     def __init__(self):
         self.client: Optional[Client] = None
         self.enabled = False
+        self.dropped_writes = 0  # writes discarded because the queue was full
 
         if not SUPABASE_AVAILABLE:
-            print("[TradeLogger] Supabase not available", flush=True)
+            log.info("Supabase not available")
             return
 
         url = os.getenv('SUPABASE_URL')
         key = os.getenv('SUPABASE_KEY')
 
         if not url or not key:
-            print("[TradeLogger] SUPABASE_URL or SUPABASE_KEY not set", flush=True)
+            log.warning("SUPABASE_URL or SUPABASE_KEY not set")
             return
 
         try:
             self.client = create_client(url, key)
+            _pool_postgrest(self.client)
             self.enabled = True
-            print("[TradeLogger] Connected to Supabase", flush=True)
+            log.info("Connected to Supabase")
         except Exception as e:
-            print(f"[TradeLogger] Failed to connect: {e}", flush=True)
+            log.error("Failed to connect: %s", e)
+            return
+
+        self._write_q: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="trade-logger", daemon=True)
+        self._flush_thread.start()
+        atexit.register(self.close)
 
-    def log_entry(self, trade: TradeRecord) -> Optional[str]:
-        """Log trade entry. Returns trade ID for later update."""
+    # === WRITE QUEUE ===
+
+    def _enqueue(self, table: str, op: str, data: Dict, match: Tuple[str, Any] = None,
+                 future: Future = None) -> bool:
+        """Queue a write for the flush thread. Drops (returns False) if the queue is full."""
+        try:
+            self._write_q.put_nowait((table, op, data, match, future))
+            return True
+        except queue.Full:
+            self.dropped_writes += 1
+            log.error("Write queue full, dropped %s %s (%d total)", table, op, self.dropped_writes)
+            if future is not None:
+                future.set_result(None)
+            return False
+
+    def _flush_loop(self):
+        """Drain the queue in batches until close() sends the stop marker"""
+        while True:
+            item = self._write_q.get()
+            batch = [item]
+            deadline = time.monotonic() + WRITE_FLUSH_INTERVAL
+            while item is not _STOP and len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._write_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            if batch:
+                self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[tuple]):
+        """
+        Send one batch: inserts with the same table and columns go out as a
+        single bulk insert, updates follow one by one in queue order.
+        """
+        inserts: Dict[tuple, List[tuple]] = {}
+        updates = []
+        for table, op, data, match, future in batch:
+            if op == 'insert':
+                inserts.setdefault((table, tuple(data)), []).append((data, future))
+            else:
+                updates.append((table, data, match))
+
+        for (table, _), rows in inserts.items():
+            self._insert_rows(table, rows)
+
+        for table, data, (column, value) in updates:
+            try:
+                self.client.table(table).update(data).eq(column, value).execute()
+            except Exception as e:
+                log.error("Update %s: %.80s", table, e)
+
+    def _insert_rows(self, table: str, rows: List[tuple]):
+        """
+        Bulk insert (data, future) rows and resolve each future to its row ID.
+
+        If the bulk insert fails (one bad row fails them all), the rows are
+        retried one by one so the good ones still get an ID.
+        """
+        try:
+            result = self.client.table(table).insert([data for data, _ in rows]).execute()
+        except Exception as e:
+            log.error("Insert %d into %s: %.80s", len(rows), table, e)
+            if len(rows) == 1:
+                _resolve(rows[0][1], None)
+                return
+            for data, future in rows:
+                try:
+                    returned = self.client.table(table).insert(data).execute().data or []
+                except Exception as e:
+                    log.error("Insert into %s: %.80s", table, e)
+                    returned = []
+                _resolve(future, returned[0]['id'] if returned else None)
+            return
+
+        returned = result.data or []
+        if len(returned) == len(rows):
+            # PostgREST returns inserted rows in request order
+            for (_, future), row in zip(rows, returned):
+                _resolve(future, row['id'])
+        else:
+            # Can't tell which row is which; an unknown ID beats a wrong one
+            log.warning("Insert into %s returned %d of %d rows", table, len(returned), len(rows))
+            for _, future in rows:
+                _resolve(future, None)
+        log.info("%d row(s) logged to %s", len(rows), table)
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending writes and stop the writer thread"""
+        if not self.enabled or not self._flush_thread.is_alive():
+            return
+        self._write_q.put(_STOP)
+        self._flush_thread.join(timeout)
+
+    def log_entry(self, trade: TradeRecord) -> Optional[Future]:
+        """
+        Queue a trade entry. Returns a Future resolving to the trade ID
+        (None if the insert failed), or None if logging is disabled.
+        """
         if not self.enabled:
             return None
 
         try:
-            hour = trade.entry_time.hour
-            is_asian = 0 <= hour < 8
-            is_london = 8 <= hour < 16
-            is_ny = 13 <= hour < 21
+            entry_time = trade.entry_time
+            hour = entry_time.hour
 
-            data = {
-                'symbol': trade.symbol,
-                'direction': trade.direction,
-                'entry_price': float(trade.entry_price),
-                'entry_time': trade.entry_time.isoformat(),
-                'qty': float(trade.qty),
-                'leverage': trade.leverage,
-                'margin_used': float(trade.margin_used),
-                'equity_at_entry': float(trade.equity_at_entry),
-                'sl_price': float(trade.sl_price),
-                'tp_price': float(trade.tp_price),
-                'order_id': trade.order_id,
-                'risk_pct': trade.risk_pct,
-                'risk_amount': trade.risk_amount,
-
-                # RZ/ATR features
-                'atr_value': trade.atr_value,
-                'zone_width': trade.zone_width,
-                'bars_in_ready': trade.bars_in_ready,
-
-                # Session
-                'hour_utc': hour,
-                'day_of_week': trade.entry_time.weekday(),
-                'is_asian_session': is_asian,
-                'is_london_session': is_london,
-                'is_ny_session': is_ny,
-            }
+            # One pass over the record, skipping None values
+            data = {k: v for k, get in _TRADE_FIELDS if (v := get(trade)) is not None}
 
-            # Remove None values
-            data = {k: v for k, v in data.items() if v is not None}
+            # Session
+            data['hour_utc'] = hour
+            data['day_of_week'] = entry_time.weekday()
+            data.update(zip(_SESSION_KEYS, _SESSION[hour]))
 
-            result = self.client.table('trades').insert(data).execute()
-
-            if result.data:
-                trade_id = result.data[0]['id']
-                print(f"  [DB] Trade logged: {trade_id[:8]}...", flush=True)
-                return trade_id
+            future = Future()
+            if self._enqueue('trades', 'insert', data, future=future):
+                return future
 
         except Exception as e:
-            print(f"  [DB ERR] Log entry: {str(e)[:80]}", flush=True)
+            log.error("Log entry: %.80s", e)
 
         return None
 
@@ -156,7 +329,7 @@ class TradeLogger:
         entry_fee: float = 0,
         exit_fee: float = 0,
     ) -> bool:
-        """Update trade with exit data."""
+        """Queue the exit update for a trade. Returns True if it was queued."""
         if not self.enabled or not trade_id:
             return False
 
@@ -178,28 +351,28 @@ class TradeLogger:
             data = {
                 'exit_price': float(exit_price),
                 'exit_time': exit_time.isoformat(),
+                'exit_time_us': _epoch_us(exit_time),
                 'exit_reason': exit_reason,
-                'duration_minutes': duration_minutes,
                 'realized_pnl': float(realized_pnl),
-                'pnl_pct': float(pnl_pct) if pnl_pct is not None else None,
-                'pnl_pct_equity': float(pnl_pct_equity) if pnl_pct_equity is not None else None,
                 'equity_at_close': float(equity_at_close),
                 'is_win': bool(is_win),
                 'total_fees': float(total_fees),
                 'net_pnl': float(net_pnl),
             }
-
-            data = {k: v for k, v in data.items() if v is not None}
-
-            result = self.client.table('trades').update(data).eq('id', trade_id).execute()
-
-            if result.data:
-                pnl_str = f"+${realized_pnl:.2f}" if realized_pnl > 0 else f"-${abs(realized_pnl):.2f}"
-                print(f"  [DB] Exit logged: {exit_reason} {pnl_str}", flush=True)
+            # Optional fields are only added when known
+            if duration_minutes is not None:
+                data['duration_minutes'] = duration_minutes
+            if pnl_pct is not None:
+                data['pnl_pct'] = float(pnl_pct)
+            if pnl_pct_equity is not None:
+                data['pnl_pct_equity'] = float(pnl_pct_equity)
+
+            if self._enqueue('trades', 'update', data, match=('id', trade_id)):
+                log.info("Exit queued: %s %s$%.2f", exit_reason, '+' if realized_pnl > 0 else '-', abs(realized_pnl))
                 return True
 
         except Exception as e:
-            print(f"  [DB ERR] Log exit: {str(e)[:80]}", flush=True)
+            log.error("Log exit: %.80s", e)
 
         return False
 
@@ -210,7 +383,7 @@ class TradeLogger:
 
         try:
             result = self.client.table('trades')\
-                .select('*')\
+                .select(_OPEN_TRADE_COLUMNS)\
                 .eq('symbol', symbol)\
                 .eq('direction', direction)\
                 .is_('exit_time', 'null')\
@@ -222,89 +395,107 @@ class TradeLogger:
                 return result.data[0]
 
         except Exception as e:
-            print(f"  [DB ERR] Find open trade: {str(e)[:80]}", flush=True)
+            log.error("Find open trade: %.80s", e)
 
         return None
 
     def get_stats(self) -> Dict[str, Any]:
-        """Get trading statistics"""
+        """Get trading statistics (aggregated server-side by the trade_stats() function)"""
         if not self.enabled:
             return {}
 
         try:
-            result = self.client.table('trades')\
-                .select('*')\
-                .not_.is_('exit_time', 'null')\
-                .execute()
+            result = self.client.rpc('trade_stats').execute()
 
-            trades = result.data
-            if not trades:
+            stats = result.data[0] if result.data else None
+            if not stats or not stats['total_trades']:
                 return {'total_trades': 0}
 
-            wins = [t for t in trades if t.get('is_win')]
-            losses = [t for t in trades if not t.get('is_win')]
-
-            total_pnl = sum(t.get('net_pnl', 0) or t.get('realized_pnl', 0) for t in trades)
-
+            total = stats['total_trades']
             return {
-                'total_trades': len(trades),
-                'wins': len(wins),
-                'losses': len(losses),
-                'win_rate': len(wins) / len(trades) * 100 if trades else 0,
-                'total_pnl': total_pnl,
+                'total_trades': total,
+                'wins': stats['wins'],
+                'losses': stats['losses'],
+                'win_rate': stats['wins'] / total * 100,
+                'total_pnl': stats['total_pnl'],
             }
 
         except Exception as e:
-            print(f"  [DB ERR] Get stats: {e}", flush=True)
+            log.error("Get stats: %s", e)
             return {}
 
+    @staticmethod
+    def _winrate_stats(wins: int, total: int) -> Dict[str, Any]:
+        """Winrate dict for a symbol from its win count and closed-trade count"""
+        # Wilson score lower bound for confidence
+        # With few trades, we're less confident in the winrate
+        winrate = wins / total if total > 0 else 0.5
+
+        # Confidence: 0 to 1, based on number of trades
+        # 10+ trades = full confidence
+        confidence = min(total / 10, 1.0)
+
+        return {
+            'wins': wins,
+            'losses': total - wins,
+            'total': total,
+            'winrate': winrate,
+            'confidence': confidence
+        }
+
     def get_symbol_winrate(self, symbol: str) -> Dict[str, Any]:
         """
-        Get historical winrate for a specific symbol.
+        Get historical winrate for a specific symbol (from the symbol_winrate
+        view, refreshed every minute).
         Returns wins, losses, total, winrate, and confidence score.
 
         Confidence scoring: more trades = more confidence in winrate
         """
         if not self.enabled:
-            return {'wins': 0, 'losses': 0, 'total': 0, 'winrate': 0.5, 'confidence': 0}
+            return self._winrate_stats(0, 0)
 
         try:
-            result = self.client.table('trades')\
-                .select('is_win')\
+            result = self.client.table('symbol_winrate')\
+                .select('wins,total')\
                 .eq('symbol', symbol)\
-                .not_.is_('exit_time', 'null')\
+                .maybe_single()\
                 .execute()
 
-            trades = result.data
-            if not trades:
-                return {'wins': 0, 'losses': 0, 'total': 0, 'winrate': 0.5, 'confidence': 0}
+            row = result.data if result else None
+            if not row:
+                return self._winrate_stats(0, 0)
+            return self._winrate_stats(row['wins'], row['total'])
 
-            wins = sum(1 for t in trades if t.get('is_win'))
-            losses = len(trades) - wins
-            total = len(trades)
+        except Exception as e:
+            log.error("Get symbol winrate: %s", e)
+            return self._winrate_stats(0, 0)
 
-            # Wilson score lower bound for confidence
-            # With few trades, we're less confident in the winrate
-            winrate = wins / total if total > 0 else 0.5
+    def get_symbol_winrates(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Winrates for many symbols in one query (all traded symbols if None).
+        Symbols without closed trades get the neutral default.
+        Returns {} on error so callers fall back to per-symbol lookups.
+        """
+        if not self.enabled:
+            return {s: self._winrate_stats(0, 0) for s in symbols or ()}
 
-            # Confidence: 0 to 1, based on number of trades
-            # 10+ trades = full confidence
-            confidence = min(total / 10, 1.0)
+        try:
+            query = self.client.table('symbol_winrate').select('symbol,wins,total')
+            if symbols is not None:
+                query = query.in_('symbol', list(symbols))
+            result = query.execute()
 
-            return {
-                'wins': wins,
-                'losses': losses,
-                'total': total,
-                'winrate': winrate,
-                'confidence': confidence
-            }
+            winrates = {s: self._winrate_stats(0, 0) for s in symbols or ()}
+            for row in result.data or []:
+                winrates[row['symbol']] = self._winrate_stats(row['wins'], row['total'])
+            return winrates
 
         except Exception as e:
-            print(f"  [DB ERR] Get symbol winrate: {e}", flush=True)
-            return {'wins': 0, 'losses': 0, 'total': 0, 'winrate': 0.5, 'confidence': 0}
+            log.error("Get symbol winrates: %s", e)
+            return {}
 
     def log_shadow_trade(self, shadow_data: Dict[str, Any]) -> Optional[str]:
-        """Log a shadow trade (signal not executed but tracked for ML)"""
+        """Queue a shadow trade (signal not executed but tracked for ML). Returns its ID if queued."""
         if not self.enabled:
             return None
 
@@ -327,82 +518,62 @@ class TradeLogger:
 
             data = {k: v for k, v in data.items() if v is not None}
 
-            result = self.client.table('shadow_trades').insert(data).execute()
-
-            if result.data:
-                print(f"  [DB] Shadow trade logged: {shadow_data['id'][:20]}...", flush=True)
+            # Best-effort ML data: queued like trades, silently dropped if the queue is full
+            if self._enqueue('shadow_trades', 'insert', data):
                 return shadow_data['id']
 
         except Exception as e:
-            print(f"  [DB ERR] Log shadow trade: {str(e)[:80]}", flush=True)
+            log.error("Log shadow trade: %.80s", e)
 
         return None
 
     def update_shadow_trade(self, shadow_id: str, outcome: str, exit_price: float) -> bool:
-        """Update shadow trade with outcome (WIN/LOSS)"""
+        """Queue a shadow trade outcome (WIN/LOSS) update. Returns True if it was queued."""
         if not self.enabled:
             return False
 
-        try:
-            from datetime import datetime
-
-            data = {
-                'status': outcome,
-                'outcome': outcome,
-                'exit_price': exit_price,
-                'exit_time': datetime.utcnow().isoformat(),
-            }
-
-            result = self.client.table('shadow_trades')\
-                .update(data)\
-                .eq('shadow_id', shadow_id)\
-                .execute()
-
-            if result.data:
-                print(f"  [DB] Shadow trade updated: {shadow_id[:20]}... -> {outcome}", flush=True)
-                return True
-
-        except Exception as e:
-            print(f"  [DB ERR] Update shadow trade: {str(e)[:80]}", flush=True)
-
-        return False
+        data = {
+            'status': outcome,
+            'outcome': outcome,
+            'exit_price': exit_price,
+            'exit_time': datetime.utcnow().isoformat(),
+        }
+        return self._enqueue('shadow_trades', 'update', data, match=('shadow_id', shadow_id))
 
     def get_shadow_stats(self) -> Dict[str, Any]:
-        """Get shadow trade statistics for ML analysis"""
+        """Get shadow trade statistics for ML analysis (aggregated by shadow_trade_stats())"""
         if not self.enabled:
             return {}
 
         try:
-            result = self.client.table('shadow_trades')\
-                .select('*')\
-                .not_.is_('outcome', 'null')\
-                .execute()
+            result = self.client.rpc('shadow_trade_stats').execute()
 
-            shadows = result.data
-            if not shadows:
+            stats = result.data[0] if result.data else None
+            if not stats or not stats['total']:
                 return {'total': 0}
 
-            wins = [s for s in shadows if s.get('outcome') == 'WIN']
-            losses = [s for s in shadows if s.get('outcome') == 'LOSS']
-
+            total = stats['total']
             return {
-                'total': len(shadows),
-                'wins': len(wins),
-                'losses': len(losses),
-                'winrate': len(wins) / len(shadows) * 100 if shadows else 0,
+                'total': total,
+                'wins': stats['wins'],
+                'losses': stats['losses'],
+                'winrate': stats['wins'] / total * 100,
             }
 
         except Exception as e:
-            print(f"  [DB ERR] Get shadow stats: {e}", flush=True)
+            log.error("Get shadow stats: %s", e)
             return {}
 
 
 # Global instance
 _logger: Optional[TradeLogger] = None
+_logger_lock = threading.Lock()
 
 def get_trade_logger() -> TradeLogger:
-    """Get or create global trade logger instance"""
+    """Get or create global trade logger instance (safe to call from any thread)"""
     global _logger
     if _logger is None:
-        _logger = TradeLogger()
+        with _logger_lock:
+            if _logger is None:
+                _logger = TradeLogger()
     return _logger
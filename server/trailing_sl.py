@@ -18,14 +18,19 @@ Config via env vars:
 import threading
 import time
 import json
+import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional
 
-from pybit.unified_trading import WebSocket
-
 from config import config
 import telegram_alerts
 
+log = logging.getLogger("trailing_sl")
+
+# Bybit pushes linear tickers every 100ms; evaluate each symbol at most this often
+TICK_DEBOUNCE_SEC = 0.1
+
 
 class TrailingSLMonitor:
     """
@@ -39,16 +44,25 @@ class TrailingSLMonitor:
         self.threshold_pct = config.risk.trail_tp_threshold_pct / 100  # e.g. 0.85
         self.sl_move_pct = config.risk.trail_sl_move_pct / 100  # e.g. 0.30
 
-        # Tracked positions: symbol -> {direction, entry, tp, sl, original_sl, trail_activated}
+        # Tracked positions: symbol -> {direction, entry, tp, sl, original_sl, trail_activated, lock}
+        # trail_activated is an Event so the common "already moved" check takes no lock;
+        # each position has its own lock, and self._lock guards adding/removing symbols
+        # together with the websocket and its subscriptions.
         self.tracked: Dict[str, Dict] = {}
         self._lock = threading.Lock()
 
         # Websocket
         self.ws = None
         self._running = False
+        self._stop_event = threading.Event()  # set by stop(); wakes the ws thread immediately
 
-        print(f"[TRAILING SL] Initialized (enabled={self.enabled}, "
-              f"threshold={self.threshold_pct*100}%, move={self.sl_move_pct*100}%)")
+        # Exchange SL updates run here, off the websocket callback thread
+        self._sl_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="trailing-sl")
+        self._subscribed: set = set()  # symbols with a ticker subscription on the current ws (under _lock)
+        self._last_eval: Dict[str, float] = {}  # symbol -> monotonic time of last threshold check
+
+        log.info("Initialized (enabled=%s, threshold=%s%%, move=%s%%)",
+                 self.enabled, self.threshold_pct * 100, self.sl_move_pct * 100)
 
     def track_position(self, symbol: str, direction: str, entry: float, tp: float, sl: float):
         """Start tracking a position for trailing SL."""
@@ -62,78 +76,88 @@ class TrailingSLMonitor:
                 'tp': tp,
                 'sl': sl,
                 'original_sl': sl,
-                'trail_activated': False,
+                'trail_activated': threading.Event(),
+                'lock': threading.Lock(),
             }
+            # Subscribe to ticker if websocket is running; a reconnect in
+            # progress picks the symbol up from self.tracked instead
+            if self._running and self.ws:
+                self._subscribe([symbol])
 
-        print(f"[TRAILING SL] Tracking {direction.upper()} {symbol} "
-              f"entry={entry}, tp={tp}, sl={sl}")
-
-        # Subscribe to ticker if websocket is running
-        if self._running and self.ws:
-            self._subscribe(symbol)
+        log.info("Tracking %s %s entry=%s, tp=%s, sl=%s", direction.upper(), symbol, entry, tp, sl)
 
     def untrack_position(self, symbol: str):
         """Stop tracking a position."""
         with self._lock:
             self.tracked.pop(symbol, None)
-        print(f"[TRAILING SL] Untracked {symbol}")
+        self._last_eval.pop(symbol, None)
+        log.info("Untracked %s", symbol)
 
     def start(self):
         """Start the websocket monitor in a background thread."""
         if not self.enabled:
-            print("[TRAILING SL] Disabled, not starting")
+            log.info("Disabled, not starting")
             return
 
         self._running = True
+        self._stop_event.clear()
         thread = threading.Thread(target=self._run_ws, daemon=True)
         thread.start()
-        print("[TRAILING SL] Websocket monitor started")
+        log.info("Websocket monitor started")
 
     def stop(self):
         """Stop the websocket monitor."""
         self._running = False
+        self._stop_event.set()
         if self.ws:
             try:
                 self.ws.exit()
             except Exception:
                 pass
-        print("[TRAILING SL] Stopped")
+        log.info("Stopped")
 
     def _run_ws(self):
         """Run websocket connection with auto-reconnect."""
+        # Imported here so loading this module doesn't pull in pybit's websocket stack
+        from pybit.unified_trading import WebSocket
+
         while self._running:
             try:
-                self.ws = WebSocket(
+                ws = WebSocket(
                     testnet=config.api.testnet,
                     channel_type="linear",
                 )
 
-                # Subscribe to all currently tracked symbols
+                # Swap in the new ws and subscribe all tracked symbols in one request
                 with self._lock:
+                    self.ws = ws
+                    self._subscribed = set()
                     symbols = list(self.tracked.keys())
+                    if symbols:
+                        self._subscribe(symbols)
 
-                for symbol in symbols:
-                    self._subscribe(symbol)
+                log.info("Websocket connected, watching %d symbols", len(symbols))
 
-                print(f"[TRAILING SL] Websocket connected, watching {len(symbols)} symbols")
-
-                # Keep alive
-                while self._running:
-                    time.sleep(1)
+                # pybit runs its own reader thread; just block until stop()
+                self._stop_event.wait()
 
             except Exception as e:
-                print(f"[TRAILING SL] Websocket error: {e}, reconnecting in 5s...")
-                time.sleep(5)
+                log.warning("Websocket error: %s, reconnecting in 5s...", e)
+                self._stop_event.wait(timeout=5)
 
-    def _subscribe(self, symbol: str):
-        """Subscribe to ticker for a symbol."""
+    def _subscribe(self, symbols: list):
+        """Subscribe a batch of symbols, skipping ones already subscribed; caller holds self._lock."""
+        new = [s for s in symbols if s not in self._subscribed]
+        if not new:
+            return
         try:
             self.ws.ticker_stream(
-                symbol=symbol,
+                symbol=new,
                 callback=self._on_ticker,
             )
+            self._subscribed.update(new)
         except Exception as e:
-            print(f"[TRAILING SL] Subscribe error for {symbol}: {e}")
+            log.error("Subscribe error for %s: %s", ', '.join(new), e)
 
     def _on_ticker(self, message: dict):
         """Handle ticker update — check if trailing SL should activate."""
@@ -145,9 +169,17 @@ class TrailingSLMonitor:
             if not symbol or not last_price:
                 return
 
-            with self._lock:
-                pos = self.tracked.get(symbol)
-                if not pos or pos['trail_activated']:
+            pos = self.tracked.get(symbol)
+            if not pos or pos['trail_activated'].is_set():
+                return
+
+            now = time.monotonic()
+            if now - self._last_eval.get(symbol, 0.0) < TICK_DEBOUNCE_SEC:
+                return
+            self._last_eval[symbol] = now
+
+            with pos['lock']:
+                if pos['trail_activated'].is_set():
                     return
 
                 entry = pos['entry']
@@ -174,32 +206,40 @@ class TrailingSLMonitor:
                     new_sl = entry - tp_distance * self.sl_move_pct
 
                 old_sl = pos['sl']
-                pos['trail_activated'] = True
                 pos['sl'] = new_sl
+                pos['trail_activated'].set()
+
+            log.info("%s hit %s%% (price=%s, threshold=%.6f)",
+                     symbol, self.threshold_pct * 100, last_price, threshold_price)
+            log.info("Moving SL: %s -> %s", old_sl, new_sl)
+
+            # REST call runs on the pool so the websocket reader thread returns immediately
+            self._sl_pool.submit(self._apply_sl, symbol, pos, old_sl, new_sl)
 
-            # Move SL on exchange (outside lock)
-            print(f"[TRAILING SL] {symbol} hit {self.threshold_pct*100}% "
-                  f"(price={last_price}, threshold={threshold_price:.6f})")
-            print(f"[TRAILING SL] Moving SL: {old_sl} -> {new_sl}")
+        except Exception as e:
+            log.error("Ticker error: %s", e)
 
+    def _apply_sl(self, symbol: str, pos: Dict, old_sl: float, new_sl: float):
+        """Move the SL on the exchange; on failure revert state so the next tick retries."""
+        direction = pos['direction']
+        try:
             side = "Buy" if direction == 'long' else "Sell"
             symbol_info = self.executor.get_symbol_info(symbol)
             success = self.executor.update_stop_loss(symbol, side, new_sl, symbol_info)
-
-            if success:
-                telegram_alerts.send_trailing_sl_moved(
-                    symbol=symbol,
-                    direction=direction,
-                    old_sl=old_sl,
-                    new_sl=new_sl,
-                    entry=entry,
-                )
-            else:
-                # Revert state so it tries again
-                with self._lock:
-                    if symbol in self.tracked:
-                        self.tracked[symbol]['trail_activated'] = False
-                        self.tracked[symbol]['sl'] = old_sl
-
         except Exception as e:
-            print(f"[TRAILING SL] Ticker error: {e}")
+            log.error("SL update error for %s: %s", symbol, e)
+            success = False
+
+        if success:
+            telegram_alerts.send_trailing_sl_moved(
+                symbol=symbol,
+                direction=direction,
+                old_sl=old_sl,
+                new_sl=new_sl,
+                entry=pos['entry'],
+            )
+        else:
+            # Revert state so it tries again
+            with pos['lock']:
+                pos['sl'] = old_sl
+                pos['trail_activated'].clear()
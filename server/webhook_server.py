@@ -26,23 +26,260 @@ Environment Variables:
 """
 
 import os
+import sys
 import json
 import hmac
+import queue
+import atexit
 import hashlib
+import logging
+import logging.handlers
 import threading
 import time
+import math
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import count, islice
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
 from config import config
 from executor import BybitExecutor
 from trade_logger import get_trade_logger, TradeRecord
 from trailing_sl import TrailingSLMonitor
+from price_stream import PriceStream
 import telegram_alerts
 
+
+def setup_logging(level: int = logging.INFO) -> Optional[logging.handlers.QueueListener]:
+    """
+    Route all log records through a queue drained by a background listener,
+    so request threads never block on stdout writes.
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers):
+        return None
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("[%(name)s] %(levelname)s %(message)s"))
+
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    return listener
+
+
+setup_logging()
+
+log = logging.getLogger("webhook")
+if config.webhook_debug:
+    log.setLevel(logging.DEBUG)
+
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so request.json and jsonify skip the stdlib encoder"""
+
+    _OPTIONS = orjson.OPT_NON_STR_KEYS if ORJSON_AVAILABLE else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=str, option=self._OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=str, option=self._OPTIONS), mimetype=self.mimetype
+        )
+
+
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire ttl seconds after being stored.
+    Oldest entries are evicted first once maxsize is reached.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            expires_at, value = self._data[key]
+            if time.monotonic() < expires_at:
+                return value
+            del self._data[key]
+        self._dropped([key])
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        """Store value for ttl seconds (default: the cache's ttl)"""
+        evicted = []
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False)[0])
+        if evicted:
+            self._dropped(evicted)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self) -> List[tuple]:
+        """Snapshot of live (key, value) pairs, oldest first"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (expires_at, value) in self._data.items() if now < expires_at]
+
+    def keys(self) -> List:
+        return [key for key, _ in self.items()]
+
+    def expire(self) -> int:
+        """Drop expired entries; returns how many were dropped"""
+        now = time.monotonic()
+        with self._lock:
+            dead = [key for key, (expires_at, _) in self._data.items() if now >= expires_at]
+            for key in dead:
+                del self._data[key]
+        if dead:
+            self._dropped(dead)
+        return len(dead)
+
+    def add(self, key, value=True) -> bool:
+        """Store key unless it holds a live entry; True if it was stored"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() < entry[0]:
+                return False
+            self[key] = value
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None or time.monotonic() >= entry[0]:
+                return default
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _dropped(self, keys: list):
+        """Hook: keys removed by expiry or eviction (not by pop/clear)"""
+
+
+# Optional shared store (REDIS_URL): webhook dedup and state snapshots
+_redis = redis.Redis.from_url(config.redis_url) if REDIS_AVAILABLE and config.redis_url else None
+
+
+class SnapshotTTLCache(TTLCache):
+    """
+    TTLCache mirrored into a Redis hash when REDIS_URL is set, so entries
+    survive a restart. Values are JSON dicts whose one datetime field
+    (time_field, the entry's creation time) is stored as an ISO string.
+    Mutating a stored dict in place needs save(key) to reach Redis.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, time_field: str):
+        super().__init__(maxsize, ttl)
+        self.hash_name = f"so:{name}"
+        self.time_field = time_field
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        super().set(key, value, ttl)
+        self._write(key, value)
+
+    def save(self, key):
+        """Write a live entry through again after changing it in place"""
+        value = self.get(key)
+        if value is not None:
+            self._write(key, value)
+
+    def pop(self, key, default=None):
+        value = super().pop(key, default)
+        self._dropped([key])
+        return value
+
+    def _dropped(self, keys: list):
+        if _redis is not None:
+            try:
+                _redis.hdel(self.hash_name, *keys)
+            except Exception as e:
+                log.error("[STATE] Redis delete error (%s): %s", self.hash_name, e)
+
+    def _write(self, key, value):
+        if _redis is not None:
+            try:
+                _redis.hset(self.hash_name, key, json.dumps(value, default=datetime.isoformat))
+            except Exception as e:
+                log.error("[STATE] Redis write error (%s): %s", self.hash_name, e)
+
+    def restore(self) -> int:
+        """Load the Redis snapshot (oldest first, remaining TTL kept); returns entries loaded"""
+        if _redis is None:
+            return 0
+        now = datetime.utcnow()
+        live, stale = [], []
+        for key, raw in _redis.hgetall(self.hash_name).items():
+            value = json.loads(raw)
+            value[self.time_field] = stamp = datetime.fromisoformat(value[self.time_field])
+            age = (now - stamp).total_seconds()
+            if age < self.ttl:
+                live.append((stamp, key.decode(), value, self.ttl - age))
+            else:
+                stale.append(key)
+        for _, key, value, ttl in sorted(live, key=lambda row: row[0]):
+            TTLCache.set(self, key, value, ttl)  # already in Redis
+        if stale:
+            _redis.hdel(self.hash_name, *stale)
+        return len(live)
+
 
 # Global executor
 executor: Optional[BybitExecutor] = None
@@ -50,17 +287,123 @@ executor: Optional[BybitExecutor] = None
 # Trailing SL monitor
 trailing_monitor: Optional[TrailingSLMonitor] = None
 
-# Track pending orders for cancellation
-pending_orders: Dict[str, Dict[str, Any]] = {}
+# Open positions by side, maintained on entry/exit and resynced from the
+# exchange every OPEN_RESYNC_SEC so TP/SL fills without an EXIT alert are caught
+OPEN_RESYNC_SEC = 60
+open_counts: Dict[str, int] = {'buy': 0, 'sell': 0}
+open_positions: Dict[str, str] = {}  # symbol -> 'buy' / 'sell'
+_open_synced_at = float('-inf')
+_open_lock = threading.Lock()
+# Bybit position side -> our side key, without a .lower() per position
+_POSITION_SIDES = {'Buy': 'buy', 'Sell': 'sell'}
 
-# Track ready states (for context when TRIGGERED arrives)
-ready_states: Dict[str, Dict[str, Any]] = {}  # key = "LONG_BTCUSDT"
 
-# Shadow trades - trades not executed but tracked for ML
-shadow_trades: Dict[str, Dict[str, Any]] = {}  # key = "LONG_BTCUSDT_timestamp"
+def resync_open_positions(positions: Optional[list]):
+    """
+    Replace the open-position counters with the exchange's view.
+    None means the fetch failed: the current counters are kept and the
+    next trigger retries the resync.
+    """
+    global _open_synced_at
+    if positions is None:
+        log.warning("Positions unavailable, keeping open-position counters")
+        return
+    # One pass: index by symbol and count per side
+    sides: Dict[str, str] = {}
+    counts = {'buy': 0, 'sell': 0}
+    for p in positions:
+        if p.symbol in sides:  # hedge mode: one slot per symbol
+            continue
+        side = _POSITION_SIDES.get(p.side) or p.side.lower()
+        sides[p.symbol] = side
+        counts[side] += 1
+    with _open_lock:
+        open_positions.clear()
+        open_positions.update(sides)
+        open_counts.update(counts)
+        _open_synced_at = time.monotonic()
+
+
+def reserve_open(symbol: str, side: str, limit: int) -> Optional[str]:
+    """
+    Claim a position slot for a new entry ('buy' / 'sell') before ordering.
+    Check and claim happen under one lock, so concurrent triggers cannot both
+    pass the limits. Returns None once claimed, else why the entry is blocked.
+    Release with record_closed() if the order is not placed.
+    """
+    with _open_lock:
+        if open_counts[side] >= limit:
+            return 'max_longs_reached' if side == 'buy' else 'max_shorts_reached'
+        if symbol in open_positions:
+            return 'duplicate_position'
+        open_positions[symbol] = side
+        open_counts[side] += 1
+        return None
+
+
+def record_closed(symbol: str):
+    """Release a symbol's slot once its position is closed"""
+    with _open_lock:
+        side = open_positions.pop(symbol, None)
+        if side:
+            open_counts[side] -= 1
+
+
+# Runs independent exchange lookups of one webhook concurrently
+_io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="webhook-io")
+# Longest a TRIGGERED event waits on any one of those lookups (seconds)
+TRIGGER_IO_TIMEOUT = 15
+
+# Verified webhook events waiting for the event worker: (handler, data).
+# One worker drains it in arrival order, so READY always runs before its TRIGGERED.
+WEBHOOK_QUEUE_SIZE = 256
+_event_queue: "queue.Queue[Tuple[Any, Dict[str, Any]]]" = queue.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+_event_worker: Optional[threading.Thread] = None
+
+# Supabase trade logger, resolved once and shared by all handlers
+trade_logger = get_trade_logger()
+
+# Live prices for symbols with active shadow trades
+price_stream: Optional[PriceStream] = None
+# Set when a symbol with active shadows ticks; dirty_symbols says which ones
+price_event = threading.Event()
+dirty_symbols: Set[str] = set()
+_dirty_lock = threading.Lock()
+# Full sweep interval (REST fallback for symbols without a streamed price)
+SHADOW_SWEEP_SEC = 30
+
+# Caps on in-memory history (oldest entries go first)
+MAX_PENDING_ORDERS = 1000
+MAX_READY_STATES = 1000
+MAX_SHADOWS = 5000
+# Pending orders and READY states nobody resolved are dropped after these
+PENDING_ORDER_TTL = 24 * 3600
+READY_STATE_TTL = 3600  # refreshed by each UPDATE
+# Resolved shadow trades are kept this long for /shadows, then dropped
+SHADOW_RETENTION_SEC = 24 * 3600
+
+# Track pending orders for cancellation
+pending_orders = SnapshotTTLCache('pending_orders', MAX_PENDING_ORDERS, PENDING_ORDER_TTL, time_field='created_at')
 
-# Pending signals queue (for scoring when multiple arrive)
-pending_signals: List[Dict[str, Any]] = []
+# Track ready states (for context when TRIGGERED arrives)
+ready_states = SnapshotTTLCache('ready_states', MAX_READY_STATES, READY_STATE_TTL, time_field='time')  # key = "LONG_BTCUSDT"
+
+# Shadow trades - trades not executed but tracked for ML (insertion ordered, capped at MAX_SHADOWS)
+shadow_trades: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # key = "LONG_BTCUSDT_<ms>_<seq>"
+# Per-process sequence so shadows created in the same millisecond get distinct ids
+_shadow_seq = count()
+# (finalized_at, shadow_id) in resolution order, for SHADOW_RETENTION_SEC expiry
+_finalized_shadows: deque = deque()
+# Index of ACTIVE shadow trades: symbol -> shadow ids (symbols drop out once all resolve)
+shadow_by_symbol: Dict[str, Set[str]] = defaultdict(set)
+active_shadow_ids: Set[str] = set()
+# Resolved shadows currently held in shadow_trades, by outcome (kept in step on resolve/evict)
+shadow_outcomes: Dict[str, int] = {'WIN': 0, 'LOSS': 0}
+# Guards writes to shadow_trades / shadow_by_symbol / active_shadow_ids / shadow_outcomes
+_shadow_lock = threading.RLock()
+
+# Pending signals (for scoring when multiple arrive), latest per (direction, symbol)
+pending_signals: Dict[Tuple[str, str], Dict[str, Any]] = {}
 signal_batch_window_ms = 500  # Wait this long to collect signals before scoring
 last_signal_time: Optional[float] = None
 signal_processor_lock = threading.Lock()
@@ -77,54 +420,95 @@ def init_executor():
     return executor
 
 
+# Keyed once; config is frozen. Each request copies the template instead of re-keying.
+_WEBHOOK_SECRET_BYTES = config.webhook_secret.encode() if config.webhook_secret else None
+_HMAC_TEMPLATE = hmac.new(_WEBHOOK_SECRET_BYTES, None, hashlib.sha256) if _WEBHOOK_SECRET_BYTES else None
+
+
 def verify_webhook(payload: bytes, signature: str) -> bool:
     """Verify webhook signature (optional)"""
-    if not config.webhook_secret:
+    if _HMAC_TEMPLATE is None:
         return True
-    expected = hmac.new(
-        config.webhook_secret.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
-    return hmac.compare_digest(signature, expected)
+    try:
+        received = bytes.fromhex(signature)
+    except ValueError:
+        return False
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(payload)
+    return hmac.compare_digest(received, mac.digest())
 
 
+@lru_cache(maxsize=512)
 def ensure_usdt_suffix(symbol: str) -> str:
-    """Ensure symbol has USDT suffix for Bybit"""
+    """
+    Ensure symbol has USDT suffix for Bybit.
+    Alerts repeat a small set of coins, so results are cached and interned:
+    every handler gets the same str object for a symbol.
+    """
     symbol = symbol.upper().replace("/", "")
     if not symbol.endswith('USDT'):
         symbol = symbol + 'USDT'
-    return symbol
+    return sys.intern(symbol)
 
 
 # =============================================================================
 # SCORING SYSTEM (for trade selection when multiple signals)
 # =============================================================================
 
-# Cache for symbol winrates (avoid DB calls every signal)
-_winrate_cache: Dict[str, Dict[str, Any]] = {}
-_winrate_cache_ttl = 300  # 5 minutes
+# Cache for symbol winrates (avoid DB calls every signal), 5 minutes per symbol
+_winrate_cache = TTLCache(maxsize=512, ttl=300)
 
 
 def get_cached_winrate(symbol: str) -> Dict[str, Any]:
     """Get winrate from cache or DB"""
-    import time
-    now = time.time()
-
-    if symbol in _winrate_cache:
-        cached = _winrate_cache[symbol]
-        if now - cached.get('_cached_at', 0) < _winrate_cache_ttl:
-            return cached
+    try:
+        return _winrate_cache[symbol]
+    except KeyError:
+        pass
 
     # Fetch from DB
-    logger = get_trade_logger()
-    winrate_data = logger.get_symbol_winrate(symbol)
-    winrate_data['_cached_at'] = now
+    winrate_data = trade_logger.get_symbol_winrate(symbol)
     _winrate_cache[symbol] = winrate_data
-
     return winrate_data
 
 
+def warm_winrate_cache(symbols: Optional[List[str]] = None):
+    """Prime the winrate cache with one batched query (every traded symbol if None)"""
+    for symbol, winrate_data in trade_logger.get_symbol_winrates(symbols).items():
+        _winrate_cache[symbol] = winrate_data
+
+
+def _above(edge: float) -> float:
+    """Smallest float above edge, for strict "x > edge" bucket bounds"""
+    return math.nextafter(edge, math.inf)
+
+
+# Feature score tables: (ascending edges, scores). A value scores
+# scores[bisect_right(edges, x)], so a value equal to an edge lands above it.
+_RSI_LONG = ((20, 30, 40, 50, _above(70)), (4, 3, 2, 1, 0, -2))  # oversold is best
+_RSI_SHORT = ((30, _above(50), _above(60), _above(70), _above(80)), (-2, 0, 1, 2, 3, 4))  # overbought is best
+_VOLUME_RATIO = ((0.5, _above(1.0), _above(1.5), _above(2.5)), (-1, 0, 1, 2, 3))  # more confirmation is better
+_ATR_PCT = ((0.5, 1.0, 2.0, _above(4.0), _above(6.0), _above(8.0)), (-1, 0, 1, 2, 1, 0, -1))  # 2-4% is ideal
+
+
+def _feature_score(table: tuple, x: float) -> int:
+    """Bucket x against a score table; NaN scores 0, like the failed comparisons it gets"""
+    edges, scores = table
+    if x != x:
+        return 0
+    return scores[bisect_right(edges, x)]
+
+
+@lru_cache(maxsize=1024)
+def _feature_points(direction: str, rsi, volume_ratio, atr_percent) -> float:
+    """RSI + volume + ATR% part of the score; pure, so memoized on the raw alert values"""
+    return float(
+        _feature_score(_RSI_LONG if direction == 'long' else _RSI_SHORT, float(rsi))
+        + _feature_score(_VOLUME_RATIO, float(volume_ratio))
+        + _feature_score(_ATR_PCT, float(atr_percent))
+    )
+
+
 def calculate_signal_score(data: Dict[str, Any], direction: str, include_history: bool = True) -> float:
     """
     Calculate a score for a trading signal based on ML features.
@@ -136,56 +520,8 @@ def calculate_signal_score(data: Dict[str, Any], direction: str, include_history
     - ATR %: Sweet spot around 2-4% is ideal
     - Historical Winrate: Weighted by confidence (more trades = more weight)
     """
-    score = 0.0
-
-    # RSI scoring (0-100 scale)
-    rsi = float(data.get('rsi', 50))
-    if direction == 'long':
-        # For longs: RSI < 30 is best, RSI > 70 is worst
-        if rsi < 20:
-            score += 4
-        elif rsi < 30:
-            score += 3
-        elif rsi < 40:
-            score += 2
-        elif rsi < 50:
-            score += 1
-        elif rsi > 70:
-            score -= 2
-    else:
-        # For shorts: RSI > 70 is best, RSI < 30 is worst
-        if rsi > 80:
-            score += 4
-        elif rsi > 70:
-            score += 3
-        elif rsi > 60:
-            score += 2
-        elif rsi > 50:
-            score += 1
-        elif rsi < 30:
-            score -= 2
-
-    # Volume Ratio scoring (higher = more confirmation)
-    vol_ratio = float(data.get('volumeRatio', 1.0))
-    if vol_ratio > 2.5:
-        score += 3
-    elif vol_ratio > 1.5:
-        score += 2
-    elif vol_ratio > 1.0:
-        score += 1
-    elif vol_ratio < 0.5:
-        score -= 1  # Low volume = weak signal
-
-    # ATR % scoring (sweet spot: 2-4%)
-    atr_pct = float(data.get('atrPercent', 2.0))
-    if 2.0 <= atr_pct <= 4.0:
-        score += 2  # Ideal volatility
-    elif 1.0 <= atr_pct < 2.0 or 4.0 < atr_pct <= 6.0:
-        score += 1  # Acceptable
-    elif atr_pct > 8.0:
-        score -= 1  # Too volatile
-    elif atr_pct < 0.5:
-        score -= 1  # Too quiet
+    score = _feature_points(direction, data.get('rsi', 50), data.get('volumeRatio', 1.0),
+                            data.get('atrPercent', 2.0))
 
     # Historical winrate scoring (confidence-weighted)
     if include_history:
@@ -210,14 +546,52 @@ def calculate_signal_score(data: Dict[str, Any], direction: str, include_history
     return score
 
 
+# =============================================================================
+# WEBHOOK IDEMPOTENCY (TradingView retries alerts it thinks timed out)
+# =============================================================================
+
+EVENT_DEDUP_TTL = 3600
+# Shared across workers/restarts via _redis when REDIS_URL is set; otherwise per process
+_seen_events = TTLCache(maxsize=10_000, ttl=EVENT_DEDUP_TTL)
+
+
+def webhook_event_id(alert_type: str, data: Dict[str, Any]) -> str:
+    """Stable fingerprint of an alert; a retried delivery hashes the same"""
+    symbol = data.get('coin') or data.get('symbol', '')
+    fingerprint = (f"{alert_type}|{symbol}|{data.get('direction', '')}|"
+                   f"{data.get('entry', '')}|{data.get('sl', '')}|{data.get('time', '')}")
+    return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+def claim_event(event_id: str) -> bool:
+    """True the first time event_id is seen within EVENT_DEDUP_TTL (atomic)"""
+    if _redis is not None:
+        try:
+            return bool(_redis.set(f"wh:{event_id}", 1, nx=True, ex=EVENT_DEDUP_TTL))
+        except Exception as e:
+            log.warning("Redis dedup error, using local cache: %s", e)
+    return _seen_events.add(event_id)
+
+
+def release_event(event_id: str):
+    """Forget a claimed event so a retry is processed (e.g. it was never queued)"""
+    _seen_events.pop(event_id)
+    if _redis is not None:
+        try:
+            _redis.delete(f"wh:{event_id}")
+        except Exception as e:
+            log.warning("Redis dedup error: %s", e)
+
+
 # =============================================================================
 # SHADOW TRADE TRACKING (for ML data collection)
 # =============================================================================
 
-def create_shadow_trade(data: Dict[str, Any], reason: str) -> str:
+def create_shadow_trade(data: Dict[str, Any], reason: str, score: Optional[float] = None) -> str:
     """
     Create a shadow trade entry for ML tracking.
     Shadow trades are signals we didn't execute but want to track outcomes.
+    Pass the signal score if the caller already computed it.
     """
     symbol = ensure_usdt_suffix(data.get('coin', ''))
     direction = data.get('direction', '').lower()
@@ -225,9 +599,10 @@ def create_shadow_trade(data: Dict[str, Any], reason: str) -> str:
     tp = float(data.get('tp', 0))
     sl = float(data.get('sl', 0))
 
-    shadow_id = f"{direction.upper()}_{symbol}_{int(time.time() * 1000)}"
+    shadow_id = f"{direction.upper()}_{symbol}_{time.time_ns() // 1_000_000}_{next(_shadow_seq)}"
+    created_at = datetime.utcnow()
 
-    shadow_trades[shadow_id] = {
+    shadow = {
         'id': shadow_id,
         'symbol': symbol,
         'direction': direction,
@@ -235,97 +610,226 @@ def create_shadow_trade(data: Dict[str, Any], reason: str) -> str:
         'tp': tp,
         'sl': sl,
         'reason': reason,  # Why it wasn't executed
-        'created_at': datetime.utcnow(),
+        'created_at': created_at,
+        'created_at_iso': created_at.isoformat(),  # preformatted for /shadows
         'rsi': float(data.get('rsi', 0)),
         'volume_ratio': float(data.get('volumeRatio', 0)),
         'atr_percent': float(data.get('atrPercent', 0)),
-        'score': calculate_signal_score(data, direction),
+        'score': score if score is not None else calculate_signal_score(data, direction),
         'status': 'ACTIVE',  # ACTIVE, WIN, LOSS
         'outcome': None,
         'exit_time': None,
+        'exit_time_iso': None,
     }
 
-    print(f"[SHADOW] Created shadow trade: {shadow_id} (reason: {reason})")
+    with _shadow_lock:
+        shadow_trades[shadow_id] = shadow
+        shadow_by_symbol[symbol].add(shadow_id)
+        active_shadow_ids.add(shadow_id)
+        while len(shadow_trades) > MAX_SHADOWS:
+            _drop_shadow(*shadow_trades.popitem(last=False))
+
+    log.info("[SHADOW] Created shadow trade: %s (reason: %s)", shadow_id, reason)
+
+    if price_stream:
+        price_stream.subscribe(symbol)
 
     # Log to Supabase
-    logger = get_trade_logger()
-    if hasattr(logger, 'log_shadow_trade'):
-        logger.log_shadow_trade(shadow_trades[shadow_id])
+    trade_logger.log_shadow_trade(shadow)
 
     return shadow_id
 
 
-def check_shadow_trades():
+def _drop_shadow(shadow_id: str, shadow: Dict[str, Any]):
+    """Unindex an evicted shadow trade; caller holds _shadow_lock"""
+    if shadow['outcome']:
+        shadow_outcomes[shadow['outcome']] -= 1
+    elif shadow_id in active_shadow_ids:
+        active_shadow_ids.discard(shadow_id)
+        ids = shadow_by_symbol.get(shadow['symbol'])
+        if ids is not None:
+            ids.discard(shadow_id)
+            if not ids:
+                del shadow_by_symbol[shadow['symbol']]
+
+
+def expire_shadow_trades():
+    """Drop resolved shadow trades older than SHADOW_RETENTION_SEC"""
+    cutoff = time.monotonic() - SHADOW_RETENTION_SEC
+    with _shadow_lock:
+        while _finalized_shadows and _finalized_shadows[0][0] < cutoff:
+            _, shadow_id = _finalized_shadows.popleft()
+            shadow = shadow_trades.pop(shadow_id, None)
+            if shadow is not None:
+                _drop_shadow(shadow_id, shadow)
+
+
+# All linear tickers from one REST call, reused for a few seconds: (fetched_at, {symbol: price})
+TICKER_SNAPSHOT_TTL = 3
+_ticker_snapshot: tuple = (0.0, {})
+
+
+def fetch_last_prices() -> Dict[str, float]:
+    """
+    Last price for every linear symbol in a single REST call, for symbols the
+    price stream has no price for yet. Cached for TICKER_SNAPSHOT_TTL seconds.
+    """
+    global _ticker_snapshot
+    fetched_at, prices = _ticker_snapshot
+    now = time.monotonic()
+    if now - fetched_at < TICKER_SNAPSHOT_TTL or not executor:
+        return prices
+
+    ticker = executor.client.get_tickers(category="linear")
+    prices = {item['symbol']: float(item['lastPrice']) for item in ticker['result']['list']}
+    _ticker_snapshot = (now, prices)
+    return prices
+
+
+def check_shadow_trades(symbols: Optional[Set[str]] = None):
     """
     Background task to check shadow trades for TP/SL hits.
-    Called periodically by the shadow monitor thread.
+    Called by the shadow monitor thread with the symbols that just ticked,
+    or with None for a full sweep.
+
+    Prices come from the websocket price stream; symbols without a streamed
+    price yet share one batched REST ticker call.
     """
-    if not executor or not shadow_trades:
+    if not active_shadow_ids:
         return
 
-    # Get current prices for all symbols with shadow trades
-    symbols_to_check = set(st['symbol'] for st in shadow_trades.values() if st['status'] == 'ACTIVE')
-
-    for symbol in symbols_to_check:
+    # Copy just the ids to check; webhook threads may add shadows meanwhile
+    with _shadow_lock:
+        if symbols is None:
+            symbols = list(shadow_by_symbol)
+        active_by_symbol = {symbol: list(shadow_by_symbol[symbol]) for symbol in symbols
+                            if symbol in shadow_by_symbol}
+
+    prices = {}
+    if price_stream:
+        for symbol in active_by_symbol:
+            price = price_stream.price(symbol)
+            if price is None:
+                price_stream.subscribe(symbol)
+            else:
+                prices[symbol] = price
+
+    if len(prices) < len(active_by_symbol):
         try:
-            # Get current price
-            ticker = executor.session.get_tickers(category="linear", symbol=symbol)
-            if ticker and 'result' in ticker and 'list' in ticker['result'] and ticker['result']['list']:
-                current_price = float(ticker['result']['list'][0]['lastPrice'])
-
-                # Check all active shadow trades for this symbol
-                for shadow_id, shadow in list(shadow_trades.items()):
-                    if shadow['symbol'] != symbol or shadow['status'] != 'ACTIVE':
-                        continue
-
-                    entry = shadow['entry']
-                    tp = shadow['tp']
-                    sl = shadow['sl']
-                    direction = shadow['direction']
-
-                    outcome = None
-
-                    if direction == 'long':
-                        if current_price >= tp:
-                            outcome = 'WIN'
-                        elif current_price <= sl:
-                            outcome = 'LOSS'
-                    else:  # short
-                        if current_price <= tp:
-                            outcome = 'WIN'
-                        elif current_price >= sl:
-                            outcome = 'LOSS'
-
-                    if outcome:
-                        shadow_trades[shadow_id]['status'] = outcome
-                        shadow_trades[shadow_id]['outcome'] = outcome
-                        shadow_trades[shadow_id]['exit_time'] = datetime.utcnow()
-                        shadow_trades[shadow_id]['exit_price'] = current_price
-
-                        print(f"[SHADOW] {shadow_id} -> {outcome} (price: {current_price})")
-
-                        # Log to Supabase
-                        logger = get_trade_logger()
-                        if hasattr(logger, 'update_shadow_trade'):
-                            logger.update_shadow_trade(shadow_id, outcome, current_price)
-
+            rest_prices = fetch_last_prices()
         except Exception as e:
-            print(f"[SHADOW] Error checking {symbol}: {e}")
+            log.error("[SHADOW] Error fetching tickers: %s", e)
+            rest_prices = {}
+        for symbol in active_by_symbol:
+            if symbol not in prices and symbol in rest_prices:
+                prices[symbol] = rest_prices[symbol]
+
+    for symbol, shadow_ids in active_by_symbol.items():
+        current_price = prices.get(symbol)
+        if current_price is None:
+            continue
+
+        resolved = 0
+        for shadow_id in shadow_ids:
+            shadow = shadow_trades.get(shadow_id)
+            if shadow is None:  # evicted by MAX_SHADOWS since the id copy
+                continue
+            tp = shadow['tp']
+            sl = shadow['sl']
+            direction = shadow['direction']
+
+            outcome = None
+
+            if direction == 'long':
+                if current_price >= tp:
+                    outcome = 'WIN'
+                elif current_price <= sl:
+                    outcome = 'LOSS'
+            else:  # short
+                if current_price <= tp:
+                    outcome = 'WIN'
+                elif current_price >= sl:
+                    outcome = 'LOSS'
+
+            if outcome:
+                resolved += 1
+                with _shadow_lock:
+                    active_shadow_ids.discard(shadow_id)
+                    shadow_by_symbol[symbol].discard(shadow_id)
+                    shadow['status'] = outcome
+                    shadow['outcome'] = outcome
+                    shadow['exit_time'] = exit_time = datetime.utcnow()
+                    shadow['exit_time_iso'] = exit_time.isoformat()
+                    shadow['exit_price'] = current_price
+                    shadow_outcomes[outcome] += 1
+                    _finalized_shadows.append((time.monotonic(), shadow_id))
+
+                log.info("[SHADOW] %s -> %s (price: %s)", shadow_id, outcome, current_price)
+
+                # Log to Supabase
+                trade_logger.update_shadow_trade(shadow_id, outcome, current_price)
+
+        # No active shadows left for this symbol: drop it from the index and stop streaming it
+        if resolved:
+            with _shadow_lock:
+                emptied = not shadow_by_symbol[symbol]
+                if emptied:
+                    del shadow_by_symbol[symbol]
+            if emptied and price_stream:
+                price_stream.unsubscribe(symbol)
+
+
+def on_shadow_tick(symbol: str, price: float):
+    """Price stream callback: wake the shadow monitor for symbols with active shadows"""
+    if symbol in shadow_by_symbol:
+        with _dirty_lock:
+            dirty_symbols.add(symbol)
+        price_event.set()
+
+
+def take_dirty_symbols() -> Set[str]:
+    """Symbols that ticked since the last call"""
+    with _dirty_lock:
+        symbols = set(dirty_symbols)
+        dirty_symbols.clear()
+    return symbols
+
+
+def start_price_stream():
+    """Start the websocket price stream used by the shadow monitor"""
+    global price_stream
+    if price_stream is None:
+        price_stream = PriceStream(on_tick=on_shadow_tick)
+        for symbol in list(shadow_by_symbol):
+            price_stream.subscribe(symbol)
+        price_stream.start()
 
 
 def start_shadow_monitor():
     """Start background thread to monitor shadow trades"""
     def monitor_loop():
+        next_sweep = 0.0
         while True:
+            # Woken by streamed ticks; the timeout triggers the periodic full sweep.
+            # Clear before reading dirty_symbols so a tick arriving mid-check re-wakes us.
+            price_event.wait(timeout=max(0.0, next_sweep - time.monotonic()))
+            price_event.clear()
             try:
-                check_shadow_trades()
+                if time.monotonic() >= next_sweep:
+                    take_dirty_symbols()
+                    check_shadow_trades()
+                    expire_shadow_trades()
+                    ready_states.expire()
+                    pending_orders.expire()
+                    next_sweep = time.monotonic() + SHADOW_SWEEP_SEC
+                else:
+                    check_shadow_trades(take_dirty_symbols())
             except Exception as e:
-                print(f"[SHADOW] Monitor error: {e}")
-            time.sleep(30)  # Check every 30 seconds
+                log.error("[SHADOW] Monitor error: %s", e)
 
     thread = threading.Thread(target=monitor_loop, daemon=True)
     thread.start()
-    print("[SHADOW] Shadow trade monitor started")
+    log.info("[SHADOW] Shadow trade monitor started")
 
 
 # =============================================================================
@@ -335,14 +839,14 @@ def start_shadow_monitor():
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    active_shadows = sum(1 for s in shadow_trades.values() if s['status'] == 'ACTIVE')
     return jsonify({
         'status': 'ok',
         'time': datetime.utcnow().isoformat(),
         'testnet': config.api.testnet,
         'pending_orders': len(pending_orders),
         'ready_states': len(ready_states),
-        'shadow_trades': {'active': active_shadows, 'total': len(shadow_trades)}
+        'queued_events': _event_queue.qsize(),
+        'shadow_trades': {'active': len(active_shadow_ids), 'total': len(shadow_trades)}
     })
 
 
@@ -374,33 +878,42 @@ def webhook():
             if not verify_webhook(request.data, signature):
                 return jsonify({'error': 'Invalid signature'}), 401
 
-        data = request.json
+        # Parsed by the app's JSON provider (orjson when installed), whatever the Content-Type
+        data = request.get_json(force=True, silent=True)
         if not data:
             return jsonify({'error': 'No JSON data'}), 400
 
-        print(f"\n[WEBHOOK] Received: {json.dumps(data, indent=2)}")
+        # The raw body as received; no re-serialization of the parsed payload
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Received: %s", request.get_data(as_text=True))
 
         alert_type = data.get('type', '').upper()
 
-        if alert_type == 'READY':
-            return handle_ready(data)
-        elif alert_type == 'UPDATE':
-            return handle_update(data)
-        elif alert_type == 'TRIGGERED':
-            return handle_triggered(data)
-        elif alert_type == 'EXIT':
-            return handle_exit(data)
-        elif alert_type == 'CANCELLED':
-            return handle_cancelled(data)
-        else:
+        handler = _WEBHOOK_DISPATCH.get(alert_type)
+        if handler is None:
             # Fallback: try legacy format (action=entry)
-            action = data.get('action', '')
-            if action == 'entry':
-                return handle_legacy_entry(data)
-            return jsonify({'error': f'Unknown alert type: {alert_type}'}), 400
+            if data.get('action', '') != 'entry':
+                return jsonify({'error': f'Unknown alert type: {alert_type}'}), 400
+            handler = handle_legacy_entry
+
+        # Each alert is handled once, however often TradingView delivers it
+        event_id = webhook_event_id(alert_type, data)
+        if not claim_event(event_id):
+            log.info("Duplicate %s alert ignored", alert_type or 'legacy')
+            return jsonify({'status': 'duplicate'}), 200
+
+        # Acknowledge right away; Bybit/Supabase/Telegram work runs on the event worker
+        try:
+            _event_queue.put_nowait((handler, data))
+        except queue.Full:
+            release_event(event_id)
+            log.error("Event queue full, rejecting %s alert", alert_type or 'legacy')
+            return jsonify({'error': 'Event queue full'}), 503
+
+        return jsonify({'status': 'queued', 'type': alert_type or 'legacy'}), 200
 
     except Exception as e:
-        print(f"[ERROR] Webhook error: {e}")
+        log.error("Webhook error: %s", e)
         telegram_alerts.send_error_alert(str(e), "Webhook handler")
         return jsonify({'error': str(e)}), 500
 
@@ -432,7 +945,7 @@ def handle_ready(data: Dict[str, Any]):
         'bars_ready': 0,
     }
 
-    print(f"[READY] {direction} {symbol} - Entry: {entry}, TP: {tp}, SL: {sl}")
+    log.info("[READY] %s %s - Entry: %s, TP: %s, SL: %s", direction, symbol, entry, tp, sl)
 
     # Telegram notification
     telegram_alerts.send_ready_state(
@@ -456,11 +969,13 @@ def handle_update(data: Dict[str, Any]):
     direction = data.get('direction', '').upper()
     key = f"{direction}_{symbol}"
 
-    if key in ready_states:
-        ready_states[key]['entry'] = float(data.get('entry', ready_states[key]['entry']))
-        ready_states[key]['tp'] = float(data.get('tp', ready_states[key]['tp']))
-        ready_states[key]['sl'] = float(data.get('sl', ready_states[key]['sl']))
-        ready_states[key]['bars_ready'] = int(data.get('barsReady', 0))
+    state = ready_states.get(key)
+    if state is not None:
+        state['entry'] = float(data.get('entry', state['entry']))
+        state['tp'] = float(data.get('tp', state['tp']))
+        state['sl'] = float(data.get('sl', state['sl']))
+        state['bars_ready'] = int(data.get('barsReady', 0))
+        ready_states[key] = state  # still live: restart its TTL
 
     return jsonify({'status': 'ok', 'type': 'update'})
 
@@ -483,6 +998,27 @@ def handle_triggered(data: Dict[str, Any]):
     if direction not in ['long', 'short']:
         return jsonify({'error': 'Invalid direction'}), 400
 
+    # Initialize executor
+    init_executor()
+
+    # Bybit has been failing; reject now rather than queue up behind timeouts.
+    # This and the position resync below run before the READY context is
+    # consumed, so a signal rejected by either keeps it.
+    if not executor.breaker.allow():
+        log.warning("[TRIGGERED] %s %s skipped: Bybit circuit open", direction.upper(), symbol)
+        return jsonify({'error': 'Bybit unavailable (circuit open)'}), 503
+
+    log.info("[TRIGGERED] %s %s entry=%s SL=%s (%.2f%%) TP=%s (%.2f%%)", direction.upper(), symbol,
+             entry, sl, abs(entry - sl) / entry * 100, tp, abs(tp - entry) / entry * 100)
+
+    # Refresh the open-position counters when a resync is due
+    if time.monotonic() - _open_synced_at >= OPEN_RESYNC_SEC:
+        fut_positions = _io_pool.submit(executor.get_all_positions)
+        try:
+            resync_open_positions(fut_positions.result(timeout=TRIGGER_IO_TIMEOUT))
+        except TimeoutError:
+            return jsonify({'error': 'Timed out fetching positions'}), 504
+
     # Get ready state context (if available)
     key = f"{direction.upper()}_{symbol}"
     ready_context = ready_states.pop(key, {})
@@ -490,114 +1026,124 @@ def handle_triggered(data: Dict[str, Any]):
     zone_width = ready_context.get('zone_width')
     bars_in_ready = ready_context.get('bars_ready', 0)
 
-    print(f"\n{'='*50}")
-    print(f"[TRIGGERED] {direction.upper()} {symbol}")
-    print(f"  Entry: {entry}")
-    print(f"  SL: {sl} ({abs(entry-sl)/entry*100:.2f}%)")
-    print(f"  TP: {tp} ({abs(tp-entry)/entry*100:.2f}%)")
-
-    # Initialize executor
-    init_executor()
-
-    # Check max positions limit
-    positions = executor.get_all_positions()
-    long_count = sum(1 for p in positions if p.side.lower() == 'buy')
-    short_count = sum(1 for p in positions if p.side.lower() == 'sell')
-
     # Calculate score for this signal (includes historical winrate)
     signal_score = calculate_signal_score(data, direction)
     winrate_data = get_cached_winrate(symbol)
     wr_str = f"{winrate_data['wins']}/{winrate_data['total']}" if winrate_data['total'] > 0 else "new"
-    print(f"  Score: {signal_score:.1f} (RSI={data.get('rsi', 'N/A')}, Vol={data.get('volumeRatio', 'N/A')}, ATR%={data.get('atrPercent', 'N/A')}, WR={wr_str})")
-
-    if direction == 'long' and long_count >= config.risk.max_longs:
-        msg = f"Max longs reached ({config.risk.max_longs}), creating shadow trade for {symbol}"
-        print(f"  [SHADOW] {msg}")
-        shadow_id = create_shadow_trade(data, "max_longs_reached")
-        return jsonify({'status': 'shadow', 'reason': msg, 'shadow_id': shadow_id, 'score': signal_score}), 200
-
-    if direction == 'short' and short_count >= config.risk.max_shorts:
-        msg = f"Max shorts reached ({config.risk.max_shorts}), creating shadow trade for {symbol}"
-        print(f"  [SHADOW] {msg}")
-        shadow_id = create_shadow_trade(data, "max_shorts_reached")
-        return jsonify({'status': 'shadow', 'reason': msg, 'shadow_id': shadow_id, 'score': signal_score}), 200
-
-    # Check if this specific coin already has an open position
-    existing_position = next((p for p in positions if p.symbol == symbol), None)
-    if existing_position:
-        msg = f"{symbol} already has open {existing_position.side} position, creating shadow trade"
-        print(f"  [SHADOW] {msg}")
-        shadow_id = create_shadow_trade(data, "duplicate_position")
+    log.info("  Score: %.1f (RSI=%s, Vol=%s, ATR%%=%s, WR=%s)", signal_score, data.get('rsi', 'N/A'),
+             data.get('volumeRatio', 'N/A'), data.get('atrPercent', 'N/A'), wr_str)
+
+    # Claim a slot against the max-positions limits and the one-position-per-coin rule
+    side = 'buy' if direction == 'long' else 'sell'
+    limit = config.risk.max_longs if direction == 'long' else config.risk.max_shorts
+    blocked = reserve_open(symbol, side, limit)
+    if blocked:
+        if blocked == 'duplicate_position':
+            existing_side = open_positions.get(symbol, side)
+            msg = f"{symbol} already has open {existing_side.capitalize()} position, creating shadow trade"
+        else:
+            msg = f"Max {direction}s reached ({limit}), creating shadow trade for {symbol}"
+        log.info("  [SHADOW] %s", msg)
+        shadow_id = create_shadow_trade(data, blocked, signal_score)
         return jsonify({'status': 'shadow', 'reason': msg, 'shadow_id': shadow_id, 'score': signal_score}), 200
 
-    # Get account equity
-    equity = executor.get_account_equity()
-    if equity <= 0:
-        return jsonify({'error': 'Could not get account equity'}), 500
-
-    print(f"  Equity: ${equity:.2f}")
-
-    # Get symbol info
-    symbol_info = executor.get_symbol_info(symbol)
-
-    # Set leverage
-    leverage = config.risk.default_leverage
-    executor.set_leverage(symbol, leverage)
-
-    # Calculate position size
-    risk_pct = config.risk.max_risk_per_trade_pct
-    qty = executor.calculate_position_size(equity, risk_pct, entry, sl, leverage)
-    print(f"  Qty: {qty:.6f} (${qty * entry:.2f} notional)")
-    print(f"  Risk: {risk_pct}% of ${equity:.2f} = ${equity * risk_pct / 100:.2f}")
+    # Equity and symbol info are independent REST calls; run them together,
+    # and only for entries that got a slot (shadows don't need them)
+    fut_equity = _io_pool.submit(executor.get_account_equity)
+    fut_symbol_info = _io_pool.submit(executor.get_symbol_info, symbol)
 
-    # Place order
-    tp_mode = config.risk.tp_mode
-    order_id = executor.place_order(
-        symbol=symbol,
-        direction=direction,
-        qty=executor.round_qty(qty, symbol_info['qty_step']),
-        entry=entry,
-        sl=sl,
-        tp=tp,
-        symbol_info=symbol_info,
-        tp_mode=tp_mode
-    )
+    # From here until the order is placed the slot is ours; give it back on any failure
+    order_id = None
+    try:
+        # Get account equity
+        equity = fut_equity.result(timeout=TRIGGER_IO_TIMEOUT)
+        if equity <= 0:
+            return jsonify({'error': 'Could not get account equity'}), 500
+
+        log.info("  Equity: $%.2f", equity)
+
+        # Get symbol info (served from the executor's per-symbol cache, refetched hourly)
+        symbol_info = fut_symbol_info.result(timeout=TRIGGER_IO_TIMEOUT)
+
+        # Set leverage (no REST call once this leverage has been applied to the symbol)
+        leverage = config.risk.default_leverage
+        executor.set_leverage(symbol, leverage)
+
+        # Calculate position size
+        risk_pct = config.risk.max_risk_per_trade_pct
+        qty = executor.calculate_position_size(equity, risk_pct, entry, sl, leverage)
+        rounded_qty = executor.round_qty(qty, symbol_info['qty_step'])
+        risk_amount = equity * risk_pct / 100
+        notional = qty * entry
+        log.info("  Qty: %.6f ($%.2f notional)", qty, notional)
+        log.info("  Risk: %s%% of $%.2f = $%.2f", risk_pct, equity, risk_amount)
+
+        # Place order
+        tp_mode = config.risk.tp_mode
+        order_id = executor.place_order(
+            symbol=symbol,
+            direction=direction,
+            qty=rounded_qty,
+            entry=entry,
+            sl=sl,
+            tp=tp,
+            symbol_info=symbol_info,
+            tp_mode=tp_mode
+        )
+    except TimeoutError:
+        return jsonify({'error': 'Timed out fetching equity or symbol info'}), 504
+    finally:
+        if not order_id:
+            record_closed(symbol)
 
     if order_id:
         # Track pending order
-        pending_orders[order_id] = {
+        # Also carries what handle_exit needs, so the exit path needs no Supabase read
+        entry_time = datetime.utcnow()
+        margin_used = notional / leverage
+        pending = {
             'symbol': symbol,
             'direction': direction,
-            'created_at': datetime.utcnow(),
+            'created_at': entry_time,
             'entry': entry,
             'tp': tp,
             'sl': sl,
+            'leverage': leverage,
+            'margin_used': margin_used,
+            'equity': equity,
         }
+        pending_orders[order_id] = pending
 
         # Log to Supabase
-        logger = get_trade_logger()
         trade_record = TradeRecord(
             symbol=symbol,
             direction=direction,
             entry_price=entry,
-            entry_time=datetime.utcnow(),
-            qty=executor.round_qty(qty, symbol_info['qty_step']),
+            entry_time=entry_time,
+            qty=rounded_qty,
             leverage=leverage,
-            margin_used=qty * entry / leverage,
+            margin_used=margin_used,
             equity_at_entry=equity,
             sl_price=sl,
             tp_price=tp,
             order_id=order_id,
             risk_pct=risk_pct,
-            risk_amount=equity * risk_pct / 100,
+            risk_amount=risk_amount,
             atr_value=atr_value,
             zone_width=zone_width,
             bars_in_ready=bars_in_ready,
         )
-        trade_id = logger.log_entry(trade_record)
+        trade_future = trade_logger.log_entry(trade_record)
+
+        if trade_future:
+            # Insert runs in the background; attach the ID once Supabase returns it
+            def attach_trade_id(future):
+                trade_id = future.result()
+                if trade_id:
+                    pending['trade_id'] = trade_id
+                    pending_orders.save(order_id)
 
-        if trade_id:
-            pending_orders[order_id]['trade_id'] = trade_id
+            trade_future.add_done_callback(attach_trade_id)
 
         # Start trailing SL monitoring for this position
         if trailing_monitor:
@@ -612,7 +1158,7 @@ def handle_triggered(data: Dict[str, Any]):
             tp_price=tp,
             leverage=leverage,
             risk_pct=risk_pct,
-            qty=executor.round_qty(qty, symbol_info['qty_step']),
+            qty=rounded_qty,
         )
 
         return jsonify({
@@ -633,6 +1179,14 @@ def handle_triggered(data: Dict[str, Any]):
         return jsonify({'error': 'Failed to place order'}), 500
 
 
+def find_tracked_entry(symbol: str, direction: str) -> Optional[Dict[str, Any]]:
+    """Newest pending order we placed for symbol/direction whose Supabase trade id is known"""
+    for _, info in reversed(pending_orders.items()):
+        if info['symbol'] == symbol and info['direction'] == direction and info.get('trade_id'):
+            return info
+    return None
+
+
 def handle_exit(data: Dict[str, Any]):
     """
     Handle EXIT alert - Trade closed (TP or SL hit).
@@ -643,13 +1197,27 @@ def handle_exit(data: Dict[str, Any]):
     outcome = data.get('outcome', '').upper()  # "WIN" or "LOSS"
     exit_price = float(data.get('exitPrice', 0))
 
-    print(f"[EXIT] {direction.upper()} {symbol} -> {outcome} @ {exit_price}")
-
-    # Find the open trade in Supabase
-    logger = get_trade_logger()
-    open_trade = logger.find_open_trade(symbol, direction)
+    log.info("[EXIT] %s %s -> %s @ %s", direction.upper(), symbol, outcome, exit_price)
+
+    record_closed(symbol)
+    if executor:
+        executor.invalidate_equity()  # realized PnL changes equity
+
+    # Entry details: from our own tracked order when we have its trade id, else from Supabase
+    tracked = find_tracked_entry(symbol, direction)
+    if tracked:
+        trade_id = tracked['trade_id']
+        entry_price = tracked['entry']
+        entry_time = tracked['created_at']
+        margin_used = tracked['margin_used']
+        equity = tracked['equity']
+        leverage = tracked['leverage']
+    else:
+        open_trade = trade_logger.find_open_trade(symbol, direction)
+        if not open_trade:
+            log.warning("No open trade found for %s %s", direction, symbol)
+            return jsonify({'status': 'ok', 'type': 'exit', 'warning': 'No open trade found'})
 
-    if open_trade:
         trade_id = open_trade['id']
         entry_price = open_trade['entry_price']
         entry_time = datetime.fromisoformat(open_trade['entry_time'])
@@ -657,65 +1225,60 @@ def handle_exit(data: Dict[str, Any]):
         equity = open_trade.get('equity_at_entry', 0)
         leverage = open_trade.get('leverage', config.risk.default_leverage)
 
-        # Calculate PnL
-        if direction == 'long':
-            price_change_pct = ((exit_price - entry_price) / entry_price) * 100
-        else:
-            price_change_pct = ((entry_price - exit_price) / entry_price) * 100
-
-        pnl_pct = price_change_pct * leverage
-        pnl_amount = margin_used * (pnl_pct / 100) if margin_used else 0
-
-        is_win = outcome == "WIN"
-        exit_reason = "tp" if is_win else "sl"
-        exit_time = datetime.utcnow()
-
-        # Log exit to Supabase
-        logger.log_exit(
-            trade_id=trade_id,
-            exit_price=exit_price,
-            exit_time=exit_time,
-            exit_reason=exit_reason,
-            realized_pnl=pnl_amount,
-            equity_at_close=equity + pnl_amount,
-            is_win=is_win,
-            entry_time=entry_time,
-            margin_used=margin_used,
-        )
+    # Calculate PnL (shorts profit when price falls)
+    sign = 1.0 if direction == 'long' else -1.0
+    price_change_pct = sign * (exit_price - entry_price) / entry_price * 100
+
+    pnl_pct = price_change_pct * leverage
+    pnl_amount = margin_used * (pnl_pct / 100) if margin_used else 0
+
+    is_win = outcome == "WIN"
+    exit_reason = "tp" if is_win else "sl"
+    exit_time = datetime.utcnow()
+
+    # Log exit to Supabase
+    trade_logger.log_exit(
+        trade_id=trade_id,
+        exit_price=exit_price,
+        exit_time=exit_time,
+        exit_reason=exit_reason,
+        realized_pnl=pnl_amount,
+        equity_at_close=equity + pnl_amount,
+        is_win=is_win,
+        entry_time=entry_time,
+        margin_used=margin_used,
+    )
 
-        # Duration
-        duration_mins = int((exit_time - entry_time).total_seconds() / 60)
+    # Duration
+    duration_mins = int((exit_time - entry_time).total_seconds() / 60)
 
-        # Telegram notification
-        telegram_alerts.send_trade_closed(
-            symbol=symbol,
-            direction=direction,
-            entry_price=entry_price,
-            exit_price=exit_price,
-            pnl_pct=pnl_pct,
-            outcome=outcome,
-            duration_mins=duration_mins,
-        )
+    # Telegram notification
+    telegram_alerts.send_trade_closed(
+        symbol=symbol,
+        direction=direction,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        pnl_pct=pnl_pct,
+        outcome=outcome,
+        duration_mins=duration_mins,
+    )
 
-        # Stop trailing SL monitoring
-        if trailing_monitor:
-            trailing_monitor.untrack_position(symbol)
+    # Stop trailing SL monitoring
+    if trailing_monitor:
+        trailing_monitor.untrack_position(symbol)
 
-        # Clean up pending orders for this symbol
-        to_remove = [oid for oid, info in pending_orders.items() if info['symbol'] == symbol]
-        for oid in to_remove:
-            pending_orders.pop(oid, None)
+    # Clean up pending orders for this symbol
+    to_remove = [oid for oid, info in pending_orders.items() if info['symbol'] == symbol]
+    for oid in to_remove:
+        pending_orders.pop(oid, None)
 
-        return jsonify({
-            'status': 'success',
-            'type': 'exit',
-            'symbol': symbol,
-            'outcome': outcome,
-            'pnl': pnl_amount,
-        })
-    else:
-        print(f"[WARN] No open trade found for {direction} {symbol}")
-        return jsonify({'status': 'ok', 'type': 'exit', 'warning': 'No open trade found'})
+    return jsonify({
+        'status': 'success',
+        'type': 'exit',
+        'symbol': symbol,
+        'outcome': outcome,
+        'pnl': pnl_amount,
+    })
 
 
 def handle_cancelled(data: Dict[str, Any]):
@@ -728,7 +1291,7 @@ def handle_cancelled(data: Dict[str, Any]):
     key = f"{direction}_{symbol}"
     ready_states.pop(key, None)
 
-    print(f"[CANCELLED] {direction} {symbol}")
+    log.info("[CANCELLED] %s %s", direction, symbol)
 
     telegram_alerts.send_ready_cancelled(symbol, direction.lower())
 
@@ -751,6 +1314,48 @@ def handle_legacy_entry(data: Dict[str, Any]):
     return handle_triggered(triggered_data)
 
 
+# Alert type -> handler for /webhook
+_WEBHOOK_DISPATCH = {
+    'READY': handle_ready,
+    'UPDATE': handle_update,
+    'TRIGGERED': handle_triggered,
+    'EXIT': handle_exit,
+    'CANCELLED': handle_cancelled,
+}
+
+
+def _run_event(handler, data: Dict[str, Any]):
+    """Run one queued webhook handler and log a failed result"""
+    # Handlers build Flask responses, which need an app context outside a request
+    with app.app_context():
+        result = handler(data)
+        response, code = result if isinstance(result, tuple) else (result, 200)
+        if code >= 400:
+            log.warning("%s failed (%s): %s", handler.__name__, code, response.get_json())
+
+
+def event_worker_loop():
+    """Drain _event_queue forever; a failing event never stops the worker"""
+    while True:
+        handler, data = _event_queue.get()
+        try:
+            _run_event(handler, data)
+        except Exception as e:
+            log.error("Webhook event error: %s", e)
+            telegram_alerts.send_error_alert(str(e), f"Webhook worker ({handler.__name__})")
+        finally:
+            _event_queue.task_done()
+
+
+def start_event_worker():
+    """Start the thread that processes queued webhook events"""
+    global _event_worker
+    if _event_worker is None:
+        _event_worker = threading.Thread(target=event_worker_loop, name="webhook-events", daemon=True)
+        _event_worker.start()
+        log.info("Event worker started")
+
+
 # =============================================================================
 # STATUS ENDPOINTS
 # =============================================================================
@@ -761,12 +1366,13 @@ def status():
     init_executor()
 
     try:
-        equity = executor.get_account_equity()
-        positions = executor.get_all_positions()
+        snap = executor.snapshot()
+        positions = snap.positions
+        resync_open_positions(positions if snap.positions_ok else None)
 
         return jsonify({
             'status': 'ok',
-            'equity': equity,
+            'equity': snap.equity,
             'positions': [
                 {
                     'symbol': p.symbol,
@@ -779,6 +1385,7 @@ def status():
                 }
                 for p in positions
             ],
+            'open_orders': len(snap.open_orders),
             'pending_orders': len(pending_orders),
             'ready_states': list(ready_states.keys()),
             'testnet': config.api.testnet,
@@ -815,6 +1422,8 @@ def close_position():
 
     init_executor()
     success = executor.close_position(symbol)
+    if success:
+        record_closed(symbol)
 
     return jsonify({'status': 'success' if success else 'failed', 'symbol': symbol})
 
@@ -824,19 +1433,22 @@ def get_shadow_trades():
     """Get shadow trades for ML analysis"""
     status_filter = request.args.get('status', None)  # ACTIVE, WIN, LOSS
 
-    filtered = shadow_trades.values()
-    if status_filter:
-        filtered = [s for s in filtered if s['status'] == status_filter.upper()]
+    # shadow_trades is in creation order: walk it newest first and stop at 50
+    with _shadow_lock:
+        recent = reversed(shadow_trades.values())
+        if status_filter:
+            status_filter = status_filter.upper()
+            recent = (s for s in recent if s['status'] == status_filter)
+        recent = list(islice(recent, 50))  # Last 50
 
-    # Calculate statistics
-    all_shadows = list(shadow_trades.values())
-    wins = sum(1 for s in all_shadows if s['outcome'] == 'WIN')
-    losses = sum(1 for s in all_shadows if s['outcome'] == 'LOSS')
-    active = sum(1 for s in all_shadows if s['status'] == 'ACTIVE')
+        total = len(shadow_trades)
+        active = len(active_shadow_ids)
+        wins = shadow_outcomes['WIN']
+        losses = shadow_outcomes['LOSS']
 
     return jsonify({
         'stats': {
-            'total': len(all_shadows),
+            'total': total,
             'active': active,
             'wins': wins,
             'losses': losses,
@@ -857,10 +1469,10 @@ def get_shadow_trades():
                 'atr_percent': s['atr_percent'],
                 'status': s['status'],
                 'outcome': s['outcome'],
-                'created_at': s['created_at'].isoformat() if s['created_at'] else None,
-                'exit_time': s['exit_time'].isoformat() if s.get('exit_time') else None,
+                'created_at': s['created_at_iso'],
+                'exit_time': s['exit_time_iso'],
             }
-            for s in sorted(filtered, key=lambda x: x['created_at'], reverse=True)[:50]  # Last 50
+            for s in recent
         ]
     })
 
@@ -869,13 +1481,35 @@ def get_shadow_trades():
 # MAIN
 # =============================================================================
 
-if __name__ == '__main__':
-    port = config.port
+def restore_state():
+    """Reload ready_states / pending_orders from their Redis snapshot (REDIS_URL)"""
+    for name, cache in (('ready states', ready_states), ('pending orders', pending_orders)):
+        try:
+            restored = cache.restore()
+            if restored:
+                log.info("[STATE] Restored %d %s", restored, name)
+        except Exception as e:
+            log.error("[STATE] Could not restore %s: %s", name, e)
+
+
+_services_started = False
+
+
+def start_services():
+    """
+    Print the config banner and start the executor and background monitors,
+    once per process. Called from __main__ and wsgi.py (gunicorn never runs
+    __main__); gunicorn.conf.py's post_worker_init hook calls it as well.
+    """
+    global _services_started
+    if _services_started:
+        return
+    _services_started = True
 
     print(f"\n{'='*50}")
     print(f"S-O Trading System - Webhook Server")
     print(f"{'='*50}")
-    print(f"Port: {port}")
+    print(f"Port: {config.port}")
     print(f"Testnet: {config.api.testnet}")
     print(f"Leverage: {config.risk.default_leverage}x")
     print(f"Risk per Trade: {config.risk.max_risk_per_trade_pct}%")
@@ -889,12 +1523,26 @@ if __name__ == '__main__':
     # Initialize executor
     init_executor()
 
-    # Start shadow trade monitor (for ML data collection)
+    # Pick up READY states and pending orders from before a restart
+    restore_state()
+
+    # Process queued webhook events
+    start_event_worker()
+
+    # Start shadow trade monitor (for ML data collection) and its price feed
+    start_price_stream()
     start_shadow_monitor()
 
+    # Load all symbol winrates in one query instead of one per first signal
+    warm_winrate_cache()
+
     # Send bot started notification
-    equity = executor.get_account_equity()
-    positions = executor.get_all_positions()
-    telegram_alerts.send_bot_started(equity=equity, active_positions=len(positions))
+    snap = executor.snapshot()
+    telegram_alerts.send_bot_started(equity=snap.equity, active_positions=len(snap.positions))
+
+
+if __name__ == '__main__':
+    start_services()
 
-    app.run(host='0.0.0.0', port=port, debug=False)
+    # Development server only; production runs gunicorn -c gunicorn.conf.py wsgi:app
+    app.run(host='0.0.0.0', port=config.port, debug=False)
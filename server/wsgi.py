@@ -0,0 +1,16 @@
+"""
+S-O Trading System - WSGI Entry Point
+======================================
+gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module starts the executor and background monitors
+(webhook_server.start_services), so any WSGI server serving `app` gets
+a fully running bot. Load it in the worker process, not a preloading
+master: threads started before a fork do not survive it.
+"""
+
+from webhook_server import app, start_services
+
+start_services()
+
+__all__ = ["app"]
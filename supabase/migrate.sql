@@ -0,0 +1,96 @@
+-- =============================================================================
+-- S-O Trading System - Upgrade an EXISTING Database
+-- =============================================================================
+-- Additive changes only: safe to run on a database created by an older
+-- schema.sql, keeps all trade data, and can be re-run at any time.
+-- Run this BEFORE deploying a server version that needs these changes.
+-- (Fresh databases: just run schema.sql.)
+--
+-- Usage:
+--   1. Go to Supabase Dashboard -> SQL Editor
+--   2. Paste this entire file
+--   3. Click "Run"
+-- =============================================================================
+
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Epoch-microsecond entry/exit times (written by TradeLogger on every trade)
+-- ─────────────────────────────────────────────────────────────────────────────
+ALTER TABLE trades ADD COLUMN IF NOT EXISTS entry_time_us BIGINT;
+ALTER TABLE trades ADD COLUMN IF NOT EXISTS exit_time_us BIGINT;
+
+-- Backfill from the ISO columns
+UPDATE trades SET entry_time_us = (EXTRACT(EPOCH FROM entry_time) * 1000000)::BIGINT
+    WHERE entry_time_us IS NULL AND entry_time IS NOT NULL;
+UPDATE trades SET exit_time_us = (EXTRACT(EPOCH FROM exit_time) * 1000000)::BIGINT
+    WHERE exit_time_us IS NULL AND exit_time IS NOT NULL;
+
+COMMENT ON COLUMN trades.entry_time_us IS 'entry_time as epoch microseconds; cheaper to sort/diff than entry_time, which is kept for the dashboard';
+COMMENT ON COLUMN trades.exit_time_us IS 'exit_time as epoch microseconds; see entry_time_us';
+
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Stats functions (TradeLogger.get_stats / get_shadow_stats via .rpc())
+-- ─────────────────────────────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION trade_stats()
+RETURNS TABLE (total_trades BIGINT, wins BIGINT, losses BIGINT, total_pnl DOUBLE PRECISION)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_win),
+        COUNT(*) FILTER (WHERE is_win IS NOT TRUE),
+        COALESCE(SUM(COALESCE(NULLIF(net_pnl, 0), realized_pnl, 0)), 0)
+    FROM trades
+    WHERE exit_time IS NOT NULL;
+$$;
+
+CREATE OR REPLACE FUNCTION shadow_trade_stats()
+RETURNS TABLE (total BIGINT, wins BIGINT, losses BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE outcome = 'WIN'),
+        COUNT(*) FILTER (WHERE outcome = 'LOSS')
+    FROM shadow_trades
+    WHERE outcome IS NOT NULL;
+$$;
+
+COMMENT ON FUNCTION trade_stats IS 'Closed-trade totals for TradeLogger.get_stats()';
+COMMENT ON FUNCTION shadow_trade_stats IS 'Resolved shadow-trade totals for TradeLogger.get_shadow_stats()';
+
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Open-trade lookup (find_open_trade): only rows without an exit are indexed
+-- ─────────────────────────────────────────────────────────────────────────────
+CREATE INDEX IF NOT EXISTS idx_trades_open ON trades(symbol, direction, entry_time DESC) WHERE exit_time IS NULL;
+
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Symbol winrate view (TradeLogger.get_symbol_winrate(s)), refreshed by pg_cron
+-- ─────────────────────────────────────────────────────────────────────────────
+CREATE MATERIALIZED VIEW IF NOT EXISTS symbol_winrate AS
+    SELECT
+        symbol,
+        COUNT(*) FILTER (WHERE is_win) AS wins,
+        COUNT(*) AS total
+    FROM trades
+    WHERE exit_time IS NOT NULL
+    GROUP BY symbol;
+
+-- Unique index required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_symbol_winrate_symbol ON symbol_winrate(symbol);
+
+-- Schedule the refresh when pg_cron is available; otherwise say how to do it by hand
+DO $do$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_cron') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_cron;
+        PERFORM cron.schedule(
+            'refresh-symbol-winrate',
+            '* * * * *',
+            'REFRESH MATERIALIZED VIEW CONCURRENTLY symbol_winrate'
+        );
+    ELSE
+        RAISE NOTICE 'pg_cron not available: symbol_winrate will not refresh on its own. '
+            'Run REFRESH MATERIALIZED VIEW CONCURRENTLY symbol_winrate periodically.';
+    END IF;
+END
+$do$;
+
+COMMENT ON MATERIALIZED VIEW symbol_winrate IS 'Closed-trade wins/total per symbol, refreshed every minute';
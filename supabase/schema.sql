@@ -8,9 +8,13 @@
 --   1. Go to Supabase Dashboard -> SQL Editor
 --   2. Paste this entire file
 --   3. Click "Run"
+--
+-- This DROPS and recreates the tables. To upgrade an existing database
+-- without losing data, run migrate.sql instead.
 -- =============================================================================
 
 -- Drop old table (sysv1 schema is incompatible - different columns)
+DROP MATERIALIZED VIEW IF EXISTS symbol_winrate;
 DROP TABLE IF EXISTS trades;
 
 -- Create trades table with new S-O schema
@@ -26,6 +30,7 @@ CREATE TABLE trades (
     -- === ENTRY ===
     entry_price DOUBLE PRECISION NOT NULL,
     entry_time TIMESTAMPTZ NOT NULL,
+    entry_time_us BIGINT,              -- entry_time as epoch microseconds (UTC)
     qty DOUBLE PRECISION NOT NULL,
     leverage INTEGER NOT NULL DEFAULT 20,
     margin_used DOUBLE PRECISION,
@@ -41,6 +46,7 @@ CREATE TABLE trades (
     -- === EXIT (filled when trade closes) ===
     exit_price DOUBLE PRECISION,
     exit_time TIMESTAMPTZ,
+    exit_time_us BIGINT,               -- exit_time as epoch microseconds (UTC)
     exit_reason TEXT,  -- 'tp', 'sl', 'manual', 'be'
     duration_minutes INTEGER,
 
@@ -78,6 +84,8 @@ CREATE INDEX idx_trades_exit_time ON trades(exit_time);
 CREATE INDEX idx_trades_direction ON trades(direction);
 CREATE INDEX idx_trades_is_win ON trades(is_win);
 CREATE INDEX idx_trades_entry_time ON trades(entry_time);
+-- Open-trade lookup (find_open_trade): only rows without an exit are indexed
+CREATE INDEX idx_trades_open ON trades(symbol, direction, entry_time DESC) WHERE exit_time IS NULL;
 
 -- =============================================================================
 -- ROW LEVEL SECURITY (optional - enable if using anon key from frontend)
@@ -105,6 +113,8 @@ COMMENT ON COLUMN trades.pnl_pct IS 'PnL as percentage of margin used';
 COMMENT ON COLUMN trades.pnl_pct_equity IS 'PnL as percentage of total equity';
 COMMENT ON COLUMN trades.atr_value IS 'ATR value at entry (from Universal Backtester)';
 COMMENT ON COLUMN trades.zone_width IS 'Reversal Zone width (S1-S3 or R1-R3 distance)';
+COMMENT ON COLUMN trades.entry_time_us IS 'entry_time as epoch microseconds; cheaper to sort/diff than entry_time, which is kept for the dashboard';
+COMMENT ON COLUMN trades.exit_time_us IS 'exit_time as epoch microseconds; see entry_time_us';
 COMMENT ON COLUMN trades.bars_in_ready IS 'Number of bars in READY state before triggering';
 
 
@@ -160,3 +170,74 @@ CREATE INDEX idx_shadow_created ON shadow_trades(created_at);
 COMMENT ON TABLE shadow_trades IS 'Shadow trades - signals not executed but tracked for ML';
 COMMENT ON COLUMN shadow_trades.reason IS 'Why this trade was not executed';
 COMMENT ON COLUMN shadow_trades.score IS 'ML score at signal time (for comparing with actual outcomes)';
+
+
+-- =============================================================================
+-- STATS FUNCTIONS (called via supabase .rpc() so aggregation stays in Postgres)
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION trade_stats()
+RETURNS TABLE (total_trades BIGINT, wins BIGINT, losses BIGINT, total_pnl DOUBLE PRECISION)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_win),
+        COUNT(*) FILTER (WHERE is_win IS NOT TRUE),
+        COALESCE(SUM(COALESCE(NULLIF(net_pnl, 0), realized_pnl, 0)), 0)
+    FROM trades
+    WHERE exit_time IS NOT NULL;
+$$;
+
+CREATE OR REPLACE FUNCTION shadow_trade_stats()
+RETURNS TABLE (total BIGINT, wins BIGINT, losses BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE outcome = 'WIN'),
+        COUNT(*) FILTER (WHERE outcome = 'LOSS')
+    FROM shadow_trades
+    WHERE outcome IS NOT NULL;
+$$;
+
+COMMENT ON FUNCTION trade_stats IS 'Closed-trade totals for TradeLogger.get_stats()';
+COMMENT ON FUNCTION shadow_trade_stats IS 'Resolved shadow-trade totals for TradeLogger.get_shadow_stats()';
+
+
+-- =============================================================================
+-- SYMBOL WINRATE (precomputed for signal scoring)
+-- =============================================================================
+-- TradeLogger.get_symbol_winrate(s) reads this instead of aggregating trades
+-- per symbol. Refreshed every minute by pg_cron; the extension is enabled
+-- below when the project offers it (Supabase does).
+-- =============================================================================
+
+CREATE MATERIALIZED VIEW symbol_winrate AS
+    SELECT
+        symbol,
+        COUNT(*) FILTER (WHERE is_win) AS wins,
+        COUNT(*) AS total
+    FROM trades
+    WHERE exit_time IS NOT NULL
+    GROUP BY symbol;
+
+-- Unique index required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX idx_symbol_winrate_symbol ON symbol_winrate(symbol);
+
+-- Schedule the refresh when pg_cron is available; otherwise say how to do it by hand
+DO $do$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_cron') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_cron;
+        PERFORM cron.schedule(
+            'refresh-symbol-winrate',
+            '* * * * *',
+            'REFRESH MATERIALIZED VIEW CONCURRENTLY symbol_winrate'
+        );
+    ELSE
+        RAISE NOTICE 'pg_cron not available: symbol_winrate will not refresh on its own. '
+            'Run REFRESH MATERIALIZED VIEW CONCURRENTLY symbol_winrate periodically.';
+    END IF;
+END
+$do$;
+
+COMMENT ON MATERIALIZED VIEW symbol_winrate IS 'Closed-trade wins/total per symbol, refreshed every minute';